@@ -51,23 +51,117 @@ INTERNAL_IPS = [
     "127.0.0.1",
 ]
 
-CRONJOBS = [
-    # Run the job every 12 hours, or adjust to 2x a day
-    ('0 */12 * * *', 'data_engine.cron.check_scheduled_requests'),
-]
-
 CELERY_BROKER_URL = 'redis://127.0.0.1:6379/0'
 CELERY_RESULT_BACKEND = 'redis://127.0.0.1:6379/0'
 
 from celery.schedules import crontab
 
 CELERY_BEAT_SCHEDULE = {
-    'check-scheduled-requests-twice-a-day': {
+    'check-due-pages': {
         'task': 'data_engine.tasks.check_scheduled_requests',
-        'schedule': crontab(hour='*/12'),  # every 12 hours
+        'schedule': crontab(minute='*/15'),  # only pages whose next_check_at has come are checked
+    },
+    'prune-text-store-daily': {
+        'task': 'data_engine.tasks.prune_text_store',
+        'schedule': crontab(hour=3, minute=30),
     },
 }
 
+# Chatbot scrapes run on their own queue so a burst of chat traffic can't starve scheduled checks.
+# Its concurrency bounds them: celery -A core worker -Q chat --concurrency 2
+CELERY_TASK_ROUTES = {
+    'data_engine.tasks.run_chat_scrape': {'queue': 'chat'},
+}
+CHAT_SCRAPE_MAX_PENDING = 20  # queued + running; above this the chatbot only schedules the check
+CHAT_SCRAPE_STALE_SECONDS = 15 * 60  # a job silent this long no longer counts as pending
+
+# Counters of data_engine.metrics live in the 'metrics' cache. It has to be shared by every
+# worker, so it is the broker's Redis; the default per-process cache would split the counts.
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'metrics': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CELERY_BROKER_URL,
+        'KEY_PREFIX': 'intellinotify',
+        'OPTIONS': {'socket_connect_timeout': 1, 'socket_timeout': 1},
+    },
+}
+METRICS_CACHE = 'metrics'
+
+# Concurrent scrapes of the same page share one fetch, coordinated through a Redis lock.
+# 'local' only coalesces within one process (tests, runserver without Redis).
+SINGLE_FLIGHT_BACKEND = 'redis'
+SINGLE_FLIGHT_REDIS_URL = CELERY_BROKER_URL
+SINGLE_FLIGHT_TTL = 120  # seconds a fetch may hold the lock before others stop waiting
+
+# Adaptive polling of watched pages, see data_engine.polling.poll_interval
+POLL_MIN_INTERVAL = 30 * 60  # seconds
+POLL_DEFAULT_INTERVAL = 12 * 3600  # until a page has been seen changing
+POLL_MAX_INTERVAL = 3 * 24 * 3600  # quiet sites back off up to this
+POLL_AGE_BACKOFF_DAYS = 30  # requests waiting longer than this are checked less and less often
+POLL_DEADLINE_GRACE_DAYS = 7  # keep polling at the minimum interval this long after expected_by
+
+# Scheduled checks: how long a worker may hold a request before another one can take it over
+CHECK_CLAIM_SECONDS = 30 * 60
+# Due pages are checked in tasks of this many, each downloading its pages as one batch.
+# Bigger chunks overlap more downloads; smaller ones spread a cycle over more workers.
+CHECK_PAGES_PER_TASK = 20
+
+# Scraper fetch engine
+SCRAPER_CONCURRENCY = 50  # max page downloads in flight per worker process
+SCRAPER_TIMEOUT = 10  # seconds per plain HTTP request
+# Per-host politeness. With the 'redis' backend the limits below hold for all workers together;
+# 'local' (or Redis being down) applies them per process, so a host may then get
+# SCRAPER_MAX_PER_DOMAIN x the number of worker processes requests at once, and as many x the rate.
+SCRAPER_POLITENESS_BACKEND = 'redis'
+SCRAPER_POLITENESS_REDIS_URL = CELERY_BROKER_URL
+SCRAPER_MAX_PER_DOMAIN = 2  # requests in flight to one host
+SCRAPER_DOMAIN_RATE = 1.0  # requests per second to one host (lowered by robots.txt crawl-delay)
+SCRAPER_DOMAIN_BURST = 2
+SCRAPER_SLOT_LEASE = 300  # seconds before a slot held by a dead worker is given back
+ROBOTS_CACHE_TTL = 24 * 3600  # seconds to keep a parsed robots.txt
+SCRAPER_TOOL_RECHECK_DAYS = 7  # re-try a cheaper tool on browser-only pages this often
+SCRAPER_HEDGE_DELAY = 2.0  # seconds before racing a browser render against a slow request (None disables)
+
+# Streamed download budgets, merged over data_engine.fetcher.DEFAULT_DOWNLOAD_LIMITS
+SCRAPER_DOWNLOAD_LIMITS = {
+    'html': {'max_bytes': 5 * 1024 * 1024, 'deadline': 30},
+    'pdf': {'max_bytes': 30 * 1024 * 1024, 'deadline': 60},
+}
+
+# On-disk cache of downloaded PDFs
+PDF_CACHE_DIR = BASE_DIR / 'pdf_cache'
+PDF_CACHE_MAX_BYTES = 2 * 1024 ** 3  # least recently used PDFs are evicted above this
+PDF_CACHE_FRESH_SECONDS = 24 * 3600  # after this a cached PDF is revalidated with a conditional GET
+
+# PDF fallback search in find_notification
+PDF_SCAN_BUDGET = 30  # seconds for all PDFs linked from one page
+PDF_SCAN_PROCESSES = 4  # extractions running at once, each in its own child process
+# Extractors tried in order until one finds text, with the seconds each may take per document
+# before it is killed. Compare them on your own PDFs with manage.py benchmark_pdf_extractors.
+PDF_EXTRACTOR_CHAIN = [("pymupdf", 20), ("pypdfium2", 20), ("pdfplumber", 60)]
+PDF_SCAN_DOWNLOADS = 4  # PDFs downloading at once per scan, taken in ranked order
+PDF_SEARCH_NEWEST_FIRST = False  # search PDFs from the last page back
+NOTIFICATION_MATCH_THRESHOLD = 0.8  # 1.0 = normalized words must match exactly; lower allows typos and plurals
+
+# Full-text search over scraped notifications: "sqlite" (FTS5), "postgresql" or "scan";
+# None picks the one matching the database
+NOTIFICATION_SEARCH_BACKEND = None
+
+# Extracted text of PDFs and page snapshots, shared by every check of the same content
+TEXT_STORE_RETENTION_DAYS = 90  # drop texts unused for this long
+TEXT_STORE_MAX_ROWS = 20000  # then keep only the most recently used
+
+# Persistent Playwright browser, one per worker process
+BROWSER_POOL_MAX_PAGES = 4  # pages rendering at the same time
+BROWSER_POOL_MAX_USES = 200  # restart Chromium after this many page loads
+BROWSER_POOL_MAX_MEMORY_MB = 1024  # ...or once the browser processes use this much RAM
+
+# Scrapy crawl service (python manage.py run_crawl_service)
+CRAWL_SERVICE_ADDRESS = ('127.0.0.1', 6810)
+CRAWL_SERVICE_TIMEOUT = 120  # seconds per batch
+CRAWL_SERVICE_CONCURRENT_REQUESTS = 64
+
 
 
 
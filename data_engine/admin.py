@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification, RecentEmail, ScraperChoice, ScheduledNotificationRequest, NotificationPageMapping
+from .models import Notification, RecentEmail, ScraperChoice, ScheduledNotificationRequest, NotificationPageMapping, WatchedPage, ScraperToolStat, ExtractedText, ChatScrapeJob
 
 admin.site.register(NotificationPageMapping)
 
@@ -13,11 +13,35 @@ class RecentEmailAdmin(admin.ModelAdmin):
 
 @admin.register(ScraperChoice)
 class ScraperChoiceAdmin(admin.ModelAdmin):
-    list_display = ("url", "tool")
+    list_display = ("url", "tool", "fail_count", "last_success")
+
+@admin.register(ScraperToolStat)
+class ScraperToolStatAdmin(admin.ModelAdmin):
+    list_display = ("url", "tool", "success_rate", "avg_latency", "attempts", "last_success")
+    list_filter = ("tool",)
+    search_fields = ("url",)
 
 @admin.register(ScheduledNotificationRequest)
 class ScheduledNotificationRequestAdmin(admin.ModelAdmin):
-    list_display = ("domain_or_url", "notification_name", "active")
+    list_display = ("domain_or_url", "notification_name", "page_url", "expected_by", "active")
     list_filter = ("active",)
-    search_fields = ("domain_or_url", "notification_name")
-    date_hierarchy = "created_at"                
\ No newline at end of file
+    search_fields = ("domain_or_url", "notification_name", "page_url")
+    date_hierarchy = "created_at"
+
+@admin.register(WatchedPage)
+class WatchedPageAdmin(admin.ModelAdmin):
+    list_display = ("url", "last_fetched_at", "changed_at", "next_check_at")
+    search_fields = ("url",)
+
+@admin.register(ExtractedText)
+class ExtractedTextAdmin(admin.ModelAdmin):
+    list_display = ("source_url", "kind", "char_count", "created_at", "last_used_at")
+    list_filter = ("kind",)
+    search_fields = ("source_url", "content_hash")
+    exclude = ("compressed_text",)
+
+@admin.register(ChatScrapeJob)
+class ChatScrapeJobAdmin(admin.ModelAdmin):
+    list_display = ("domain", "notification_name", "status", "progress", "created_at")
+    list_filter = ("status",)
+    search_fields = ("domain", "notification_name")
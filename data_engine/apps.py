@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class DataEngineConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'data_engine'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from .search_index import install_search_triggers
+        post_migrate.connect(install_search_triggers, sender=self)
@@ -0,0 +1,181 @@
+import asyncio
+import atexit
+import os
+import threading
+from django.conf import settings
+from playwright.async_api import async_playwright
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _descendant_rss_mb():
+    """Resident memory of every process started by this worker (Playwright driver and Chromium)."""
+    children = {}
+    try:
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                children.setdefault(int(fields[1]), []).append((int(entry), int(fields[21])))
+            except (OSError, IndexError, ValueError):
+                continue
+    except OSError:
+        return 0  # no procfs, memory recycling is disabled
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total, stack = 0, [os.getpid()]
+    while stack:
+        for pid, rss_pages in children.get(stack.pop(), []):
+            total += rss_pages * page_size
+            stack.append(pid)
+    return total / (1024 * 1024)
+
+
+class _Generation:
+    """One Chromium instance with its shared context and idle pages."""
+
+    def __init__(self, browser, context):
+        self.browser = browser
+        self.context = context
+        self.idle_pages = []
+        self.in_flight = 0
+        self.uses = 0
+        self.retired = False
+
+    async def close(self):
+        try:
+            await self.browser.close()
+        except Exception as e:
+            print(f"Browser close error: {e}")
+
+
+class BrowserPool:
+    """
+    Long-lived headless Chromium shared by every Playwright scrape in a worker process.
+    Playwright objects belong to the event loop that created them, so the pool runs its
+    own loop in a daemon thread and callers from any thread submit work to it.
+    """
+
+    def __init__(self, max_pages=None, max_uses=None, max_memory_mb=None):
+        self.max_pages = max_pages or getattr(settings, "BROWSER_POOL_MAX_PAGES", 4)
+        self.max_uses = max_uses or getattr(settings, "BROWSER_POOL_MAX_USES", 200)
+        self.max_memory_mb = max_memory_mb or getattr(settings, "BROWSER_POOL_MAX_MEMORY_MB", 1024)
+        self.pid = os.getpid()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="browser-pool", daemon=True)
+        self.thread.start()
+        self.playwright = None
+        self.generation = None
+        self.slots = asyncio.Semaphore(self.max_pages)
+        self.start_lock = asyncio.Lock()
+
+    def submit(self, url, timeout=20000):
+        """Starts loading a page; returns a concurrent Future for (html, pdf_links) that can be cancelled."""
+        return asyncio.run_coroutine_threadsafe(self._render(url, timeout), self.loop)
+
+    def render(self, url, timeout=20000):
+        """Loads a page and returns (html, pdf_links). Raises on navigation errors and timeouts."""
+        # The page timeout only starts once a slot is free, so allow time to queue for one
+        return self.submit(url, timeout).result(timeout=timeout / 1000 * 3 + 30)
+
+    def close(self):
+        # A forked child inherits this object but not the loop thread behind it
+        if self.pid == os.getpid() and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._close(), self.loop).result(timeout=30)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def _render(self, url, timeout):
+        async with self.slots:
+            generation, page = await self._acquire_page()
+            broken = True  # until proven otherwise, also when the caller cancels us
+            try:
+                await page.goto(url, timeout=timeout)
+                html = await page.content()
+                hrefs = await page.eval_on_selector_all("a[href]", "els => els.map(e => e.getAttribute('href'))")
+                broken = False
+            finally:
+                await self._release_page(generation, page, broken=broken)
+        return html, [href for href in hrefs if href and href.lower().endswith(".pdf")]
+
+    async def _acquire_page(self):
+        async with self.start_lock:
+            if self.generation and self._should_recycle(self.generation):
+                print(f"♻️ Recycling browser after {self.generation.uses} pages")
+                await self._retire(self.generation)
+                self.generation = None
+            if self.generation is None:
+                self.generation = await self._launch()
+            generation = self.generation
+            generation.in_flight += 1
+
+        if generation.idle_pages:
+            return generation, generation.idle_pages.pop()
+        try:
+            return generation, await generation.context.new_page()
+        except Exception:
+            generation.in_flight -= 1
+            raise
+
+    async def _release_page(self, generation, page, broken=False):
+        generation.in_flight -= 1
+        generation.uses += 1
+        if broken or generation.retired:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        else:
+            try:
+                await page.goto("about:blank")
+                generation.idle_pages.append(page)
+            except Exception:
+                await page.close()
+        if generation.retired and generation.in_flight == 0:
+            await generation.close()
+
+    def _should_recycle(self, generation):
+        if generation.uses >= self.max_uses:
+            return True
+        return generation.in_flight == 0 and _descendant_rss_mb() > self.max_memory_mb
+
+    async def _retire(self, generation):
+        generation.retired = True
+        for page in generation.idle_pages:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        generation.idle_pages = []
+        if generation.in_flight == 0:
+            await generation.close()
+
+    async def _launch(self):
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+        browser = await self.playwright.chromium.launch(headless=True)
+        context = await browser.new_context()
+        print(f"🚀 Browser pool started Chromium (pid {os.getpid()})")
+        return _Generation(browser, context)
+
+    async def _close(self):
+        if self.generation:
+            await self._retire(self.generation)
+            self.generation = None
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+
+
+def get_browser_pool():
+    """Returns this process's pool, starting a new one after a fork (Celery prefork workers)."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = BrowserPool()
+            _pool_pid = os.getpid()
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,40 @@
+import hashlib
+import re
+
+# "18-10-2025", "2025/10/18", "18 Oct 2026", "Monday, October 18th, 2026", optionally followed by a clock time
+DATE = (
+    r"((mon|tue|wed|thu|fri|sat|sun)[a-z]*,?\s+)?"
+    r"(\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}|\d{1,2}(st|nd|rd|th)?\s+[a-z]{3,9}\.?,?\s+\d{4}|[a-z]{3,9}\.?\s+\d{1,2}(st|nd|rd|th)?,?\s+\d{4})"
+)
+CLOCK = r"\d{1,2}:\d{2}(:\d{2})?(\s*[ap]\.?m\.?)?"
+
+# Parts of a page that change on every request without the notices changing
+NOISE_PATTERNS = [
+    # The date and time after "Last updated:", "Server time", "Today is" ... but not the rest of the line,
+    # which may be a new notice: "Updated on 18-10-2025: Admit Card 2025 released"
+    re.compile(
+        r"(last\s+updated|last\s+modified|updated\s+on|server\s+time|current\s+(date|time)|today\s+is)\W{0,3}"
+        rf"({DATE}(\s*(,|at)?\s*{CLOCK})?|{CLOCK}(\s*,?\s*{DATE})?)",
+        re.I,
+    ),
+    # Visitor / hit counters
+    re.compile(r"(visitors?(\s+(no|number|count))?|you\s+are\s+visitor|hits|page\s*views|total\s+visits)\W{0,5}[\d,\.]+", re.I),
+    # Session ids, CSRF tokens, ASP.NET view state, nonces in raw HTML
+    re.compile(r"(__viewstate\w*|__eventvalidation|csrf\w*|\w*token|nonce|jsessionid|phpsessid|sessionid|sid)([\"'\s]*(=|:|value=)[\"'\s]*)[^\s\"'&<>;]+", re.I),
+    # Clock times: 10:22, 10:22:05, 10:22 PM
+    re.compile(r"\b\d{1,2}:\d{2}(:\d{2})?(\s*[ap]\.?m\.?)?\b", re.I),
+    # Cache busters and other long random identifiers
+    re.compile(r"\b(?=[A-Za-z_\-]*\d)[A-Za-z0-9_\-]{32,}\b"),
+]
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Strips timestamps, counters and session tokens so only meaningful content is compared."""
+    for pattern in NOISE_PATTERNS:
+        text = pattern.sub(" ", text)
+    return WHITESPACE.sub(" ", text).strip().lower()
+
+
+def content_digest(text):
+    return hashlib.sha256(normalize_text(text or "").encode("utf-8")).hexdigest()
@@ -0,0 +1,114 @@
+import threading
+from multiprocessing.connection import Listener, Client
+import crochet
+import scrapy
+from django.conf import settings
+from scrapy.crawler import CrawlerRunner
+from .extraction import extract_page, pdf_links, pdf_link_titles
+
+
+class BatchSpider(scrapy.Spider):
+    """SimpleSpider-style extraction for a whole batch of URLs in one crawl, through the lxml extractor."""
+    name = "batch_spider"
+
+    def __init__(self, urls=None, results=None, **kwargs):
+        super().__init__(**kwargs)
+        self.urls = urls or []
+        self.results = results if results is not None else {}
+
+    def start_requests(self):
+        for url in self.urls:
+            yield scrapy.Request(url, callback=self.parse, errback=self.on_error, meta={"source_url": url}, dont_filter=True)
+
+    def parse(self, response):
+        text, links = extract_page(response.body)
+        self.results[response.meta["source_url"]] = {
+            "text": text, "pdfs": pdf_links(links), "pdf_titles": pdf_link_titles(links), "error": None,
+            "elapsed": response.meta.get("download_latency", 0.0),
+        }
+
+    def on_error(self, failure):
+        self.results[failure.request.meta["source_url"]] = {"text": "", "pdfs": [], "error": repr(failure.value)}
+
+
+def get_address():
+    return getattr(settings, "CRAWL_SERVICE_ADDRESS", ("127.0.0.1", 6810))
+
+
+def get_authkey():
+    return getattr(settings, "CRAWL_SERVICE_AUTHKEY", settings.SECRET_KEY).encode()
+
+
+class CrawlService:
+    """
+    Runs one Twisted reactor and CrawlerRunner for the life of the process and serves
+    crawl batches over a local authenticated socket. Start it with `manage.py run_crawl_service`.
+    """
+
+    def __init__(self, address=None, crawl_timeout=None):
+        self.address = address or get_address()
+        self.crawl_timeout = crawl_timeout or getattr(settings, "CRAWL_SERVICE_TIMEOUT", 120)
+        crochet.setup()
+        self.runner = CrawlerRunner(settings={
+            "LOG_ENABLED": False,
+            "USER_AGENT": "Mozilla/5.0",
+            "ROBOTSTXT_OBEY": False,
+            # Scrapy's own per-host politeness, matching the fetch layer's limits
+            "DOWNLOAD_DELAY": 1 / getattr(settings, "SCRAPER_DOMAIN_RATE", 1.0),
+            "AUTOTHROTTLE_ENABLED": True,
+            "CONCURRENT_REQUESTS": getattr(settings, "CRAWL_SERVICE_CONCURRENT_REQUESTS", 64),
+            "CONCURRENT_REQUESTS_PER_DOMAIN": getattr(settings, "SCRAPER_MAX_PER_DOMAIN", 2),
+            "DOWNLOAD_TIMEOUT": getattr(settings, "SCRAPER_TIMEOUT", 10),
+            "RETRY_TIMES": 1,
+        })
+
+    def crawl(self, urls):
+        """Crawls a batch on the reactor thread and returns {url: {"text", "pdfs", "pdf_titles", "error"}}."""
+        results = {}
+        crawl = self._run_crawl(urls, results)
+        try:
+            crawl.wait(timeout=self.crawl_timeout)
+        except crochet.TimeoutError:
+            print(f"⚠️ Crawl batch timed out after {self.crawl_timeout}s, returning partial results")
+            crawl.cancel()
+        for url in urls:
+            results.setdefault(url, {"text": "", "pdfs": [], "error": "not crawled"})
+        return results
+
+    @crochet.run_in_reactor
+    def _run_crawl(self, urls, results):
+        return self.runner.crawl(BatchSpider, urls=urls, results=results)
+
+    def serve_forever(self):
+        with Listener(self.address, authkey=get_authkey()) as listener:
+            print(f"🕷️ Crawl service listening on {self.address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    print(f"Crawl service accept error: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            try:
+                urls = list(dict.fromkeys(conn.recv().get("urls", [])))
+                print(f"🕷️ Crawling batch of {len(urls)} URLs")
+                conn.send(self.crawl(urls))
+            except Exception as e:
+                print(f"Crawl service error: {e}")
+                try:
+                    conn.send({"error": str(e)})
+                except Exception:
+                    pass
+
+
+def crawl_urls(urls):
+    """Sends a batch to the running crawl service. Raises ConnectionError if it is not running."""
+    with Client(get_address(), authkey=get_authkey()) as conn:
+        conn.send({"urls": list(urls)})
+        results = conn.recv()
+    if "error" in results:
+        raise RuntimeError(results["error"])
+    return results
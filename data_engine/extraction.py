@@ -0,0 +1,79 @@
+from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+
+# Elements whose text is never visible (BeautifulSoup's get_text skips the same)
+SKIP_TAGS = {"script", "style", "template"}
+UTF8_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+
+def link_title(text):
+    """Link text on one line with single spaces, the same from either parser."""
+    return " ".join(text.split())
+
+
+def extract_with_lxml(content):
+    """Visible text and every <a href> with its link text in a single walk of an lxml tree."""
+    parser = None
+    if isinstance(content, bytes):
+        # lxml assumes latin-1 when a page doesn't declare its charset; most of ours are UTF-8
+        try:
+            content.decode("utf-8")
+            parser = UTF8_PARSER
+        except UnicodeDecodeError:
+            pass
+    root = lxml_html.document_fromstring(content, parser=parser)
+    texts, links = [], []
+    stack = [root]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            texts.append(item)
+            continue
+        tag = item.tag
+        if not isinstance(tag, str) or tag in SKIP_TAGS:
+            continue  # comments, processing instructions and hidden elements (their tails are pushed by the parent)
+        if item.text:
+            texts.append(item.text)
+        if tag == "a":
+            href = item.get("href")
+            if href:
+                links.append((href, link_title(item.text_content())))
+        # Children come back off the stack in document order, each followed by its tail text
+        for child in reversed(item):
+            if child.tail:
+                stack.append(child.tail)
+            stack.append(child)
+
+    text = "\n".join(piece for piece in (t.strip() for t in texts) if piece)
+    return text, links
+
+
+def extract_with_soup(content):
+    soup = BeautifulSoup(content, "html.parser")
+    text = soup.get_text(separator="\n", strip=True)
+    links = [(link["href"], link_title(link.get_text())) for link in soup.find_all("a", href=True)]
+    return text, links
+
+
+def extract_page(content):
+    """Returns (visible text, [(href, link text)]). Uses lxml, and BeautifulSoup only when lxml can't parse the markup."""
+    if not content:
+        return "", []
+    try:
+        return extract_with_lxml(content)
+    except (etree.ParserError, etree.XMLSyntaxError, ValueError) as e:
+        print(f"lxml could not parse page ({e}), falling back to BeautifulSoup")
+        return extract_with_soup(content)
+
+
+def pdf_links(links):
+    return [href for href, _ in links if href.lower().endswith(".pdf")]
+
+
+def pdf_link_titles(links):
+    """{href: link text} for the PDF links, used to rank PDFs before downloading them."""
+    titles = {}
+    for href, title in links:
+        if href.lower().endswith(".pdf") and title:
+            titles.setdefault(href, title)
+    return titles
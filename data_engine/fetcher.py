@@ -0,0 +1,225 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from .politeness import get_scheduler
+from .extraction import extract_page, pdf_links, pdf_link_titles
+from . import metrics
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+# Per content kind: largest body we'll hold in memory, seconds for the whole download,
+# and the Content-Types we accept (a missing header is allowed). Override in SCRAPER_DOWNLOAD_LIMITS.
+DEFAULT_DOWNLOAD_LIMITS = {
+    "html": {
+        "max_bytes": 5 * 1024 * 1024,
+        "deadline": 30,
+        "content_types": ["text/html", "application/xhtml+xml", "text/plain"],
+    },
+    "pdf": {
+        "max_bytes": 30 * 1024 * 1024,
+        "deadline": 60,
+        "content_types": ["application/pdf", "application/x-pdf", "application/octet-stream", "binary/octet-stream"],
+    },
+}
+CHUNK_SIZE = 64 * 1024
+
+_session = None
+_executor = None
+
+
+def get_concurrency():
+    return getattr(settings, "SCRAPER_CONCURRENCY", 50)
+
+
+def get_timeout():
+    return getattr(settings, "SCRAPER_TIMEOUT", 10)
+
+
+def get_session():
+    """Returns the worker-wide keep-alive session, sized for the concurrency limit."""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=100, pool_maxsize=get_concurrency())
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session = session
+    return _session
+
+
+def get_executor():
+    """Every fetch in this process goes through this pool, so its size is the global limit."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=get_concurrency(), thread_name_prefix="fetch")
+    return _executor
+
+
+def get_download_limits(kind):
+    limits = dict(DEFAULT_DOWNLOAD_LIMITS[kind])
+    limits.update(getattr(settings, "SCRAPER_DOWNLOAD_LIMITS", {}).get(kind, {}))
+    return limits
+
+
+class DownloadAborted(Exception):
+    """A streamed download broke its size, time or Content-Type budget."""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+def iter_body(response, kind, started=None):
+    """
+    Yields a streamed response body in chunks within the budgets for `kind` ("html" or "pdf").
+    Raises DownloadAborted as soon as one is broken, without reading the rest.
+    """
+    limits = get_download_limits(kind)
+    started = started or time.monotonic()
+
+    def abort(reason, message):
+        metrics.incr(f"download.{reason}.{kind}")
+        raise DownloadAborted(reason, f"{message}: {response.url}")
+
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type and limits["content_types"] and content_type not in limits["content_types"]:
+        abort("wrong_type", f"Unexpected Content-Type {content_type}")
+    declared = response.headers.get("Content-Length", "")
+    if declared.isdigit() and int(declared) > limits["max_bytes"]:
+        abort("too_large", f"Declared size {int(declared) // 1024} KB is over the limit")
+
+    size = 0
+    for chunk in response.iter_content(CHUNK_SIZE):
+        size += len(chunk)
+        if size > limits["max_bytes"]:
+            abort("too_large", f"Body passed {limits['max_bytes'] // 1024} KB")
+        if time.monotonic() - started > limits["deadline"]:
+            abort("timeout", f"Download took over {limits['deadline']}s")
+        yield chunk
+
+    metrics.incr(f"download.ok.{kind}")
+    metrics.incr(f"download.bytes.{kind}", size)
+
+
+def read_body(response, kind, started=None):
+    return b"".join(iter_body(response, kind, started))
+
+
+def parse_page(content):
+    """Returns the visible text, the .pdf links and their link texts of an HTML page."""
+    text, links = extract_page(content)
+    return text, pdf_links(links), pdf_link_titles(links)
+
+
+class FetchResult:
+    def __init__(self, url, status=None, text="", pdfs=None, error=None, elapsed=0.0,
+                 etag="", last_modified="", content_length=None, not_modified=False, pdf_titles=None):
+        self.url = url
+        self.status = status
+        self.text = text
+        self.pdfs = pdfs or []
+        self.pdf_titles = pdf_titles or {}
+        self.error = error
+        self.elapsed = elapsed
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_length = content_length
+        self.not_modified = not_modified
+
+    @property
+    def ok(self):
+        return self.status == 200 and self.error is None and not self.not_modified
+
+    def __repr__(self):
+        return f"<FetchResult {self.url} status={self.status} error={self.error}>"
+
+
+def conditional_headers(validators):
+    headers = {}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def response_validators(response):
+    length = response.headers.get("Content-Length", "")
+    return {
+        "etag": response.headers.get("ETag", ""),
+        "last_modified": response.headers.get("Last-Modified", ""),
+        "content_length": int(length) if length.isdigit() else None,
+    }
+
+
+def matches_validators(current, stored):
+    """True when a 200 response carries the validators we stored, i.e. the server ignored our conditional headers."""
+    if not stored:
+        return False
+    same_etag = bool(current["etag"]) and current["etag"] == stored.get("etag")
+    same_date = bool(current["last_modified"]) and current["last_modified"] == stored.get("last_modified")
+    same_length = None in (current["content_length"], stored.get("content_length")) or current["content_length"] == stored["content_length"]
+    return (same_etag or same_date) and same_length
+
+
+def fetch_page(url, timeout=None, validators=None, throttle=True):
+    """
+    Downloads and parses one page over the shared session. Never raises.
+    With validators from a previous fetch, sends a conditional request and skips
+    parsing when the page has not changed.
+    """
+    if throttle:
+        with get_scheduler().slot(url):
+            return fetch_page(url, timeout, validators, throttle=False)
+
+    started = time.monotonic()
+    try:
+        headers = conditional_headers(validators)
+        with get_session().get(url, timeout=timeout or get_timeout(), headers=headers, stream=True) as response:
+            meta = response_validators(response)
+            if response.status_code == 304 or (response.status_code == 200 and matches_validators(meta, validators)):
+                return FetchResult(url, status=response.status_code, not_modified=True, elapsed=time.monotonic() - started, **meta)
+            if response.status_code != 200:
+                return FetchResult(url, status=response.status_code, elapsed=time.monotonic() - started)
+            body = read_body(response, "html", started)
+        text, pdfs, titles = parse_page(body)
+        return FetchResult(url, status=200, text=text, pdfs=pdfs, pdf_titles=titles, elapsed=time.monotonic() - started, **meta)
+    except Exception as e:
+        return FetchResult(url, error=str(e), elapsed=time.monotonic() - started)
+
+
+async def fetch_many(urls, timeout=None, validators=None):
+    """
+    Fetches a batch of URLs concurrently and returns {url: FetchResult}.
+    Requests held back by a host's rate limit wait as coroutines, so they never
+    occupy a fetch thread that another host could use.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    scheduler = get_scheduler()
+    validators = validators or {}
+
+    async def polite_fetch(url):
+        async with scheduler.async_slot(url, executor):
+            return await loop.run_in_executor(executor, fetch_page, url, timeout, validators.get(url), False)
+
+    unique_urls = list(dict.fromkeys(urls))
+    results = await asyncio.gather(*(polite_fetch(url) for url in unique_urls))
+    return dict(zip(unique_urls, results))
+
+
+def fetch_pages(urls, timeout=None, validators=None):
+    """Blocking entry point for Celery tasks: fetches a batch of pages at once."""
+    urls = list(urls)
+    if not urls:
+        return {}
+    started = time.monotonic()
+    results = asyncio.run(fetch_many(urls, timeout, validators))
+    ok = sum(1 for r in results.values() if r.ok)
+    unchanged = sum(1 for r in results.values() if r.not_modified)
+    print(f"🌐 Fetched {ok}/{len(results)} pages ({unchanged} unchanged) in {time.monotonic() - started:.1f}s")
+    return results
@@ -0,0 +1,27 @@
+from django.db import transaction
+from .models import Notification, notification_fingerprint
+
+INGEST_BATCH_SIZE = 500
+
+
+def ingest_notifications(items, batch_size=INGEST_BATCH_SIZE):
+    """
+    Saves scraped (title, url, published_at) rows, skipping any already stored, so a scrape
+    can be re-run or retried safely. Returns how many new notifications were saved.
+    """
+    rows = {}
+    for title, url, published_at in items:
+        fingerprint = notification_fingerprint(title, url)
+        rows.setdefault(fingerprint, Notification(title=title, url=url, published_at=published_at, fingerprint=fingerprint))
+
+    created = 0
+    fingerprints = list(rows)
+    with transaction.atomic():
+        for start in range(0, len(fingerprints), batch_size):
+            batch = fingerprints[start:start + batch_size]
+            existing = set(Notification.objects.filter(fingerprint__in=batch).values_list("fingerprint", flat=True))
+            new = [rows[fingerprint] for fingerprint in batch if fingerprint not in existing]
+            # ignore_conflicts covers a concurrent scrape inserting the same rows in between
+            Notification.objects.bulk_create(new, batch_size=batch_size, ignore_conflicts=True)
+            created += len(new)
+    return created
@@ -0,0 +1,43 @@
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from data_engine.extraction import extract_with_lxml, extract_with_soup
+
+
+class Command(BaseCommand):
+    help = 'Compares lxml and BeautifulSoup page extraction on saved notification pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Saved .html files or directories containing them')
+        parser.add_argument('--repeat', type=int, default=20, help='Extractions per page per backend')
+
+    def handle(self, *args, **options):
+        files = []
+        for path in map(Path, options['paths']):
+            files.extend(sorted(path.rglob('*.htm*')) if path.is_dir() else [path])
+        if not files:
+            raise CommandError('No HTML files found.')
+
+        totals = {'lxml': 0.0, 'soup': 0.0}
+        for file in files:
+            content = file.read_bytes()
+            timings = {}
+            for name, extract in (('lxml', extract_with_lxml), ('soup', extract_with_soup)):
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    result = extract(content)
+                timings[name] = (time.perf_counter() - started) / options['repeat']
+                totals[name] += timings[name]
+                if name == 'lxml':
+                    lxml_result = result
+
+            same = 'same output' if lxml_result == result else 'DIFFERENT output'
+            self.stdout.write(
+                f"{file.name} ({len(content) // 1024} KB): lxml {timings['lxml'] * 1000:.2f} ms, "
+                f"soup {timings['soup'] * 1000:.2f} ms, {timings['soup'] / timings['lxml']:.1f}x, {same}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(files)} pages: lxml {totals['lxml'] * 1000:.1f} ms, soup {totals['soup'] * 1000:.1f} ms "
+            f"({totals['soup'] / totals['lxml']:.1f}x faster with lxml)"
+        ))
@@ -0,0 +1,54 @@
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from data_engine import metrics
+from data_engine.pdf_extractors import EXTRACTORS
+from data_engine.pdf_handler import run_extractor, get_extractor_chain
+
+
+class Command(BaseCommand):
+    help = 'Runs every PDF extractor on saved PDFs, or shows the extractor stats recorded by the scraper'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='PDF files or directories containing them')
+        parser.add_argument('--timeout', type=int, default=60, help='Seconds per extractor per document')
+        parser.add_argument('--stats', action='store_true', help='Show the recorded per-extractor stats instead')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            return self.show_stats()
+
+        files = []
+        for path in map(Path, options['paths']):
+            files.extend(sorted(path.rglob('*.pdf')) if path.is_dir() else [path])
+        if not files:
+            raise CommandError('No PDF files given.')
+
+        totals = {name: {'seconds': 0.0, 'ok': 0} for name in EXTRACTORS}
+        for file in files:
+            line = []
+            for name in EXTRACTORS:
+                started = time.monotonic()
+                result = run_extractor(name, file, options['timeout'])
+                elapsed = time.monotonic() - started
+                chars = len(''.join(result['pages']).strip()) if result else 0
+                totals[name]['seconds'] += elapsed
+                totals[name]['ok'] += bool(chars)
+                line.append(f"{name} {elapsed * 1000:.0f} ms {chars} chars" if result else f"{name} FAILED")
+            self.stdout.write(f"{file.name} ({file.stat().st_size // 1024} KB): {', '.join(line)}")
+
+        for name, total in sorted(totals.items(), key=lambda item: (-item[1]['ok'], item[1]['seconds'])):
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: text from {total['ok']}/{len(files)} PDFs in {total['seconds']:.1f}s"
+            ))
+
+    def show_stats(self):
+        counters = metrics.snapshot()
+        self.stdout.write(f"Chain: {' → '.join(name for name, _ in get_extractor_chain())}")
+        for name in EXTRACTORS:
+            runs = {outcome: counters.get(f"pdf_extract.{name}.{outcome}", 0) for outcome in ('ok', 'empty', 'timeout', 'error')}
+            count = sum(runs.values())
+            if not count:
+                continue
+            average = counters.get(f"pdf_extract.{name}.ms", 0) / count
+            self.stdout.write(f"{name}: {count} runs, {average:.0f} ms average, " + ", ".join(f"{k} {v}" for k, v in runs.items()))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from data_engine import text_store
+
+
+class Command(BaseCommand):
+    help = 'Deletes stored extracted texts that have not been used within the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Retention in days (default: TEXT_STORE_RETENTION_DAYS)')
+        parser.add_argument('--max-rows', type=int, help='Rows to keep at most (default: TEXT_STORE_MAX_ROWS)')
+
+    def handle(self, *args, **options):
+        deleted = text_store.prune(options['days'], options['max_rows'])
+        self.stdout.write(f'Deleted {deleted} stored texts')
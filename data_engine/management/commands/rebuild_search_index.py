@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from data_engine.search_index import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Re-indexes every notification for full-text search (only needed after writes that bypass the database triggers)'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the {type(backend).__name__} index'))
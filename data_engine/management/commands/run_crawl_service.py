@@ -0,0 +1,8 @@
+from django.core.management.base import BaseCommand
+from data_engine.crawl_service import CrawlService
+
+class Command(BaseCommand):
+    help = 'Runs the long-lived Scrapy crawl service that scraper workers send URL batches to'
+
+    def handle(self, *args, **options):
+        CrawlService().serve_forever()
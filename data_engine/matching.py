@@ -0,0 +1,264 @@
+import re
+import unicodedata
+from collections import Counter, deque
+from itertools import islice
+
+# Words are runs of letters and digits: "Admit-Card (2025)" and "admit card 2025" both read admit / card / 2025
+TOKEN = re.compile(r"[^\W_]+")
+ORDINAL = re.compile(r"^(\d+)(st|nd|rd|th)$")
+ORDINAL_WORDS = {
+    "first": "1", "second": "2", "third": "3", "fourth": "4", "fifth": "5",
+    "sixth": "6", "seventh": "7", "eighth": "8", "ninth": "9", "tenth": "10",
+}
+DEFAULT_THRESHOLD = 0.8
+# Vocabulary words less similar than this to a word of the name never count towards a fuzzy match
+WORD_FLOOR = 0.6
+# Words this short are acronyms or codes (MBA / MCA, BSc / BCom) where one letter changes the meaning
+EXACT_LENGTH = 4
+
+
+def normalize_token(token):
+    """Case, accents, ordinals and leading zeros: "Ré-Exam" / "re exam", "First" / "1st" / "01" / "1"."""
+    token = unicodedata.normalize("NFKD", token.casefold())
+    token = "".join(char for char in token if not unicodedata.combining(char))
+    token = ORDINAL_WORDS.get(token, token)
+    ordinal = ORDINAL.match(token)
+    if ordinal:
+        token = ordinal[1]
+    if token.isdigit():
+        token = token.lstrip("0") or "0"
+    return token
+
+
+def name_tokens(name):
+    return tuple(normalize_token(token) for token in TOKEN.findall(name or ""))
+
+
+def needs_exact(token):
+    """Numbers, ordinals and short words must match exactly, never fuzzily."""
+    return len(token) <= EXACT_LENGTH or any(char.isdigit() for char in token)
+
+
+def ngrams(token, n=3):
+    padded = f" {token} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class PatternMatcher:
+    """
+    Aho-Corasick automaton over a set of patterns: finds every pattern in a sequence in one
+    pass, however many there are. Patterns and text are strings (matched case-insensitively)
+    or tuples of words. Doesn't need Django, so the PDF extractor child processes use it too.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(dict.fromkeys(p.lower() if isinstance(p, str) else tuple(p) for p in patterns if p))
+        self.longest = max((len(p) for p in self.patterns), default=0)
+        # State 0 is the root; per state: transitions, failure link, patterns ending here
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for pattern in self.patterns:
+            self._add(pattern)
+        self._link()
+
+    def _add(self, pattern):
+        state = 0
+        for symbol in pattern:
+            if symbol not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+                self.goto[state][symbol] = len(self.goto) - 1
+            state = self.goto[state][symbol]
+        self.out[state].append(pattern)
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for symbol, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and symbol not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(symbol, 0) if state else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def finditer(self, sequence):
+        """Yields (start, end, pattern) for every occurrence, in order of where they end."""
+        state = 0
+        if isinstance(sequence, str):
+            sequence = sequence.lower()
+        for index, symbol in enumerate(sequence):
+            while state and symbol not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(symbol, 0)
+            for pattern in self.out[state]:
+                yield index + 1 - len(pattern), index + 1, pattern
+
+    def first_matches(self, sequence, wanted=None):
+        """{pattern: (start, end)} of the first occurrence of each pattern; stops once all `wanted` are found."""
+        wanted = set(self.patterns if wanted is None else wanted)
+        found = {}
+        if not wanted:
+            return found
+        for start, end, pattern in self.finditer(sequence):
+            if pattern in wanted and pattern not in found:
+                found[pattern] = (start, end)
+                if len(found) == len(wanted):
+                    break
+        return found
+
+
+class TextIndex:
+    """
+    The normalized words of a text. Word offsets, positions and the n-gram index over the
+    text's vocabulary are only worked out when a match or a fuzzy lookup needs them, so
+    indexing a multi-megabyte PDF stays a couple of C-speed passes.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        raw = TOKEN.findall(text)
+        # The same raw word comes up again and again: normalize each distinct one once
+        normalized = {word: normalize_token(word) for word in set(raw)}
+        self.tokens = list(map(normalized.__getitem__, raw))
+        self.vocabulary = set(normalized.values())
+        self._grams = None
+
+    def span(self, first, last):
+        """Offsets in the original text of words first..last-1."""
+        spans = [word.span() for word in islice(TOKEN.finditer(self.text), first, last)]
+        return spans[0][0], spans[-1][1]
+
+    def positions(self, words):
+        return [index for index, token in enumerate(self.tokens) if token in words]
+
+    @property
+    def grams(self):
+        if self._grams is None:
+            self._grams = {}
+            for token in self.vocabulary:
+                for gram in ngrams(token):
+                    self._grams.setdefault(gram, []).append(token)
+        return self._grams
+
+    def similar_words(self, token):
+        """{vocabulary word: similarity} for the words close to `token`. Numbers and short words must match exactly."""
+        if needs_exact(token):
+            return {token: 1.0} if token in self.vocabulary else {}
+        query = ngrams(token)
+        shared = Counter(word for gram in query for word in self.grams.get(gram, ()))
+        similar = {}
+        for word, count in shared.items():
+            # Dice coefficient of the two words' trigrams
+            score = 2 * count / (len(query) + len(ngrams(word)))
+            if score >= WORD_FLOOR:
+                similar[word] = score
+        return similar
+
+    def fuzzy_find(self, tokens, threshold):
+        """Best (score, first word, last word + 1) for a run of words close to `tokens`, or None below `threshold`."""
+        similar = [self.similar_words(token) for token in tokens]
+        if not all(similar):
+            return None
+        # Anchor on the word of the name with the fewest close words in the text
+        anchor = min(range(len(tokens)), key=lambda j: len(similar[j]))
+        weights = [len(token) for token in tokens]
+        total = sum(weights)
+        # Numbers, ordinals and acronyms carry the meaning ("2024" vs "2025", "Third" vs "Fifth", "MBA" vs "MCA"),
+        # whatever their weight
+        exact = [j for j, token in enumerate(tokens) if needs_exact(token)]
+        best = None
+        for position in self.positions(similar[anchor].keys()):
+            start = position - anchor
+            if start < 0 or start + len(tokens) > len(self.tokens):
+                continue
+            if any(self.tokens[start + j] != tokens[j] for j in exact):
+                continue
+            scores = [similar[j].get(self.tokens[start + j], 0) for j in range(len(tokens))]
+            # Every word of the name has to be there in some form, however long the others are
+            if min(scores) < WORD_FLOOR:
+                continue
+            score = sum(weight * word_score for weight, word_score in zip(weights, scores)) / total
+            if score >= threshold and (best is None or score > best[0]):
+                best = (score, start, start + len(tokens))
+        return best
+
+
+class Match:
+    def __init__(self, score, start, end):
+        self.score = score  # 1.0 when the normalized words match exactly
+        self.start = start  # offsets in the original text
+        self.end = end
+
+    def snippet(self, text, context=300):
+        return text[max(self.start - context, 0):min(self.end + context, len(text))]
+
+    def __repr__(self):
+        return f"<Match {self.score:.2f} at {self.start}>"
+
+
+class NameMatcher:
+    """
+    Finds notification names in text, ignoring case, punctuation, spacing and number
+    formatting. All names are first matched exactly on normalized words in one Aho-Corasick
+    pass; the ones not found are then looked up fuzzily through the text's n-gram index.
+    """
+
+    def __init__(self, names, threshold=DEFAULT_THRESHOLD):
+        self.names = list(dict.fromkeys(name for name in names if name_tokens(name)))
+        self.tokens = {name: name_tokens(name) for name in self.names}
+        self.threshold = threshold
+        self.automaton = PatternMatcher(self.tokens.values())
+        self.longest = max((len(name) for name in self.names), default=0)
+
+    def find(self, text, wanted=None):
+        """{name: Match} for each of the `wanted` names (default all) found in `text`."""
+        wanted = self.names if wanted is None else [name for name in wanted if name in self.tokens]
+        if not wanted or not text:
+            return {}
+        index = TextIndex(text)
+        # Only names whose every word occurs in the text can match exactly
+        possible = {self.tokens[name] for name in wanted if index.vocabulary.issuperset(self.tokens[name])}
+        exact = self.automaton.first_matches(index.tokens, possible)
+        found = {}
+        for name in wanted:
+            if self.tokens[name] in exact:
+                found[name] = Match(1.0, *index.span(*exact[self.tokens[name]]))
+                continue
+            fuzzy = index.fuzzy_find(self.tokens[name], self.threshold)
+            if fuzzy:
+                score, first, last = fuzzy
+                found[name] = Match(score, *index.span(first, last))
+        return found
+
+
+def search_pages(pages, names, newest_first=False, threshold=DEFAULT_THRESHOLD):
+    """
+    Returns {name: (page number, page text, score)} for the first of the (number, text) pairs
+    matching each name, reading pages only until every name is found. The edge of the
+    neighbouring page is kept so a name broken across a page break still matches.
+    """
+    matcher = NameMatcher(names, threshold)
+    overlap = 2 * matcher.longest
+    found = {}
+    neighbour = ""
+    for number, text in pages:
+        if newest_first:
+            window = text + "\n" + neighbour[:overlap]
+        else:
+            window = neighbour[-overlap:] + "\n" + text if overlap else text
+        neighbour = text
+        remaining = [name for name in matcher.names if name not in found]
+        for name, match in matcher.find(window, remaining).items():
+            found[name] = (number, text, match.score)
+        if matcher.names and len(found) == len(matcher.names):
+            break
+    return found
+
+
+def find_matches(text, names, threshold=DEFAULT_THRESHOLD):
+    """{name: Match} for the names found in `text`, all in one pass."""
+    return NameMatcher(names, threshold).find(text)
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.cache import caches
+
+PREFIX = "metrics:"
+NAMES_KEY = PREFIX + "_names"
+_seen = set()
+_warned = False
+
+
+def get_cache():
+    return caches[getattr(settings, "METRICS_CACHE", "default")]
+
+
+def _unavailable(e):
+    """Counters are best effort: without their cache they are dropped, with one warning per process."""
+    global _warned
+    if not _warned:
+        _warned = True
+        print(f"⚠️ Metrics cache unavailable, counters are not recorded: {e}")
+
+
+def incr(name, amount=1):
+    """Adds to a named counter in the METRICS_CACHE cache, which every worker must share."""
+    import redis
+    try:
+        _incr(get_cache(), name, amount)
+    except redis.RedisError as e:
+        _unavailable(e)
+
+
+def _incr(cache, name, amount):
+    key = PREFIX + name
+    if cache.add(key, amount, timeout=None):
+        _register(cache, name)
+        return
+    try:
+        cache.incr(key, amount)
+    except ValueError:  # evicted between add() and incr()
+        cache.set(key, amount, timeout=None)
+
+
+def _register(cache, name):
+    if name in _seen:
+        return
+    _seen.add(name)
+    names = set(cache.get(NAMES_KEY, []))
+    if name not in names:
+        names.add(name)
+        cache.set(NAMES_KEY, sorted(names), timeout=None)
+
+
+def snapshot():
+    """Returns {counter name: value} for every counter recorded so far."""
+    import redis
+    cache = get_cache()
+    try:
+        names = cache.get(NAMES_KEY, [])
+        values = cache.get_many([PREFIX + name for name in names])
+    except redis.RedisError as e:
+        _unavailable(e)
+        return {}
+    return {name: values.get(PREFIX + name, 0) for name in names}
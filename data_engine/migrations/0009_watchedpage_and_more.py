@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_engine', '0008_scraperchoice_fail_count_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WatchedPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, unique=True)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('content_length', models.IntegerField(blank=True, null=True)),
+                ('last_fetched_at', models.DateTimeField(blank=True, null=True)),
+                ('changed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='schedulednotificationrequest',
+            name='last_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
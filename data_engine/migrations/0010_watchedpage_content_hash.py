@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_engine', '0009_watchedpage_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='watchedpage',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
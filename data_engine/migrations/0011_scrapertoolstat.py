@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_engine', '0010_watchedpage_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScraperToolStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500)),
+                ('tool', models.CharField(choices=[('scrapy', 'Scrapy'), ('playwright', 'Playwright'), ('requests', 'Requests')], max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('successes', models.IntegerField(default=0)),
+                ('success_rate', models.FloatField(default=0.5)),
+                ('avg_latency', models.FloatField(default=0)),
+                ('last_attempted', models.DateTimeField(blank=True, null=True)),
+                ('last_success', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'unique_together': {('url', 'tool')},
+            },
+        ),
+    ]
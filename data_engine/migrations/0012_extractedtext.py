@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:13
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_engine', '0011_scrapertoolstat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractedText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('kind', models.CharField(choices=[('pdf', 'PDF'), ('page', 'Page snapshot')], max_length=10)),
+                ('source_url', models.URLField(max_length=500)),
+                ('compressed_text', models.BinaryField()),
+                ('pdf_links', models.JSONField(blank=True, default=list)),
+                ('char_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
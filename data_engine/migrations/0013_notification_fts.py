@@ -0,0 +1,49 @@
+from django.db import migrations
+
+FTS_TABLE = "data_engine_notification_fts"
+
+CREATE = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, url, content='data_engine_notification', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON data_engine_notification BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, url) VALUES (new.id, new.title, new.url);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON data_engine_notification BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, url) VALUES ('delete', old.id, old.title, old.url);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE ON data_engine_notification BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, url) VALUES ('delete', old.id, old.title, old.url);
+        INSERT INTO {FTS_TABLE}(rowid, title, url) VALUES (new.id, new.title, new.url);
+    END""",
+    # Index the notifications scraped before this migration
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        # Other databases use their own engine (see data_engine.search_index)
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_engine', '0012_extractedtext'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE), run_on_sqlite(DROP)),
+    ]
@@ -0,0 +1,57 @@
+import hashlib
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from django.db import migrations, models
+
+
+def normalize_url(url):
+    # Frozen copy of data_engine.models.normalize_url
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").removeprefix("www.")
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{query}" if query else "")
+
+
+def fingerprint(title, url):
+    normalized_title = " ".join(title.casefold().split())
+    return hashlib.sha256(f"{normalize_url(url)}\n{normalized_title}".encode("utf-8")).hexdigest()
+
+
+def fingerprint_and_dedupe(apps, schema_editor):
+    """Fingerprints existing rows and keeps the oldest of each set of duplicates."""
+    Notification = apps.get_model("data_engine", "Notification")
+    seen = set()
+    duplicates = []
+    for notification in Notification.objects.order_by("id").iterator():
+        notification.fingerprint = fingerprint(notification.title, notification.url)
+        if notification.fingerprint in seen:
+            duplicates.append(notification.pk)
+            continue
+        seen.add(notification.fingerprint)
+        notification.save(update_fields=["fingerprint"])
+    for start in range(0, len(duplicates), 500):
+        Notification.objects.filter(pk__in=duplicates[start:start + 500]).delete()
+    if duplicates:
+        print(f"\n  Removed {len(duplicates)} duplicate notifications")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_engine', '0013_notification_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='fingerprint',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.RunPython(fingerprint_and_dedupe, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='notification',
+            name='fingerprint',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+    ]
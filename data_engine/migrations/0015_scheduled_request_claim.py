@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_engine', '0014_notification_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulednotificationrequest',
+            name='claim_token',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='schedulednotificationrequest',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_engine', '0015_scheduled_request_claim'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulednotificationrequest',
+            name='page_url',
+            field=models.URLField(blank=True, max_length=500),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_engine', '0016_schedulednotificationrequest_page_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulednotificationrequest',
+            name='expected_by',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='watchedpage',
+            name='change_interval',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='watchedpage',
+            name='next_check_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -1,6 +1,10 @@
 from django.db import models
+from django.utils import timezone
+import hashlib
+import uuid
+import zlib
 from django.contrib.auth import get_user_model
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlsplit, parse_qsl, urlencode
 
 class NotificationPageMapping(models.Model):
     domain = models.CharField(max_length=255, unique=True)
@@ -9,11 +13,31 @@ class NotificationPageMapping(models.Model):
     def __str__(self):
         return f"{self.domain} -> {self.notification_page_url}"
 
+def normalize_url(url):
+    """Scheme, host case, "www.", default ports, trailing slashes, query order and fragments don't make a new notification."""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").removeprefix("www.")
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{query}" if query else "")
+
+def notification_fingerprint(title, url):
+    """Stable identity of a scraped notification: its normalized URL and title."""
+    normalized_title = " ".join(title.casefold().split())
+    return hashlib.sha256(f"{normalize_url(url)}\n{normalized_title}".encode("utf-8")).hexdigest()
+
 class Notification(models.Model):
     title = models.CharField(max_length=255)
     url = models.CharField(max_length=500)
     created_at = models.DateTimeField(auto_now_add=True)
     published_at = models.DateTimeField(null=True, blank=True)
+    fingerprint = models.CharField(max_length=64, unique=True)  # see notification_fingerprint()
+
+    def save(self, *args, **kwargs):
+        if not self.fingerprint:
+            self.fingerprint = notification_fingerprint(self.title, self.url)
+        super().save(*args, **kwargs)
 
     @property
     def base_url(self):
@@ -46,6 +70,82 @@ class ScraperChoice(models.Model):
     def __str__(self):
         return f"{self.url} -> {self.tool}"
 
+class ScraperToolStat(models.Model):
+    """Running success rate and latency of one scraping tool on one URL."""
+    url = models.URLField(max_length=500)
+    tool = models.CharField(max_length=20, choices=ScraperChoice._meta.get_field("tool").choices)
+    attempts = models.IntegerField(default=0)
+    successes = models.IntegerField(default=0)
+    success_rate = models.FloatField(default=0.5)  # exponentially weighted, recent attempts count most
+    avg_latency = models.FloatField(default=0)  # seconds, exponentially weighted
+    last_attempted = models.DateTimeField(null=True, blank=True)
+    last_success = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("url", "tool")
+
+    def __str__(self):
+        return f"{self.url} [{self.tool}] {self.success_rate:.0%} in {self.avg_latency:.1f}s"
+
+class WatchedPage(models.Model):
+    """
+    Fetch state of a scraped notifications page.
+    The stored validators let the next check send a conditional request, and the
+    content hash catches unchanged pages on sites that ignore those headers.
+    """
+    url = models.URLField(max_length=500, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    content_length = models.IntegerField(null=True, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)  # sha256 of the normalized page text
+    last_fetched_at = models.DateTimeField(null=True, blank=True)
+    changed_at = models.DateTimeField(null=True, blank=True)  # last time we saw new content
+    change_interval = models.FloatField(null=True, blank=True)  # running average seconds between changes
+    next_check_at = models.DateTimeField(null=True, blank=True, db_index=True)  # see polling.poll_interval()
+
+    def validators(self):
+        return {"etag": self.etag, "last_modified": self.last_modified, "content_length": self.content_length}
+
+    def has_validators(self):
+        return bool(self.etag or self.last_modified)
+
+    def unchanged_since(self, checked_since):
+        """True if nothing new has been seen since `checked_since`, so there is nothing to re-check."""
+        if not checked_since or not self.changed_at:
+            return False
+        return self.changed_at <= checked_since
+
+    def __str__(self):
+        return self.url
+
+class ExtractedText(models.Model):
+    """
+    Normalized text extracted from a PDF or a page snapshot, keyed by the hash of its
+    content so every user and cycle that sees the same document reuses one extraction.
+    PDF pages are separated by form feeds. Stored zlib-compressed.
+    """
+    KIND_CHOICES = [("pdf", "PDF"), ("page", "Page snapshot")]
+
+    content_hash = models.CharField(max_length=64, unique=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    source_url = models.URLField(max_length=500)
+    compressed_text = models.BinaryField()
+    pdf_links = models.JSONField(default=list, blank=True)  # [href, link text] pairs, page snapshots only
+    char_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    @property
+    def text(self):
+        return zlib.decompress(bytes(self.compressed_text)).decode("utf-8")
+
+    @property
+    def pages(self):
+        return self.text.split("\f")
+
+    def __str__(self):
+        return f"{self.kind}: {self.source_url} ({self.char_count} chars)"
+
 class ScheduledNotificationRequest(models.Model):
     """
     Tracks user requests for a specific notification on a site.
@@ -56,6 +156,35 @@ class ScheduledNotificationRequest(models.Model):
     notification_name = models.CharField(max_length=255, blank=True)
     active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    last_checked_at = models.DateTimeField(null=True, blank=True)
+    expected_by = models.DateTimeField(null=True, blank=True)  # when the user expects the notification out
+    page_url = models.URLField(max_length=500, blank=True)  # notifications page it resolved to, see tasks.canonicalize_requests()
+    # Lease held by the worker currently checking this request, see tasks.claim_requests()
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"[{self.domain_or_url}] => {self.notification_name} (Active: {self.active})"
+
+class ChatScrapeJob(models.Model):
+    """A scrape started from the chatbot, run on the "chat" Celery queue; chat.html polls its progress."""
+    STATUS_CHOICES = [("queued", "Queued"), ("running", "Running"), ("done", "Done"), ("failed", "Failed")]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, null=True, blank=True)
+    domain = models.CharField(max_length=255)
+    notification_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued", db_index=True)
+    progress = models.CharField(max_length=255, blank=True)  # what the worker is doing right now
+    summary = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def report(self, progress, status="running", summary=""):
+        self.status = status
+        self.progress = progress
+        self.summary = summary
+        self.save(update_fields=["status", "progress", "summary", "updated_at"])
+
+    def __str__(self):
+        return f"{self.domain} => {self.notification_name} ({self.status})"
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from django.conf import settings
+from .fetcher import get_session, get_timeout, conditional_headers, response_validators, iter_body, DownloadAborted
+from .politeness import get_scheduler
+from . import metrics
+
+_evict_lock = threading.Lock()
+
+
+def get_cache_dir():
+    path = Path(getattr(settings, "PDF_CACHE_DIR", settings.BASE_DIR / "pdf_cache"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def cache_paths(url):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    base = get_cache_dir() / key[:2]
+    base.mkdir(exist_ok=True)
+    return base / f"{key}.pdf", base / f"{key}.json"
+
+
+def load_entry(url):
+    pdf_path, meta_path = cache_paths(url)
+    try:
+        with open(meta_path) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if entry.get("url") == url and pdf_path.exists() else None
+
+
+def save_entry(url, entry):
+    _, meta_path = cache_paths(url)
+    tmp = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(entry, f)
+    os.replace(tmp, meta_path)
+
+
+def touch(path):
+    """Marks an entry as recently used; eviction removes the least recently touched files first."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def fetch_pdf(url):
+    """
+    Returns the path of a local copy of the PDF, or None if it can't be downloaded.
+    Copies younger than PDF_CACHE_FRESH_SECONDS are used without any request; older ones
+    are revalidated with a conditional GET and only downloaded again if they changed.
+    """
+    pdf_path, _ = cache_paths(url)
+    entry = load_entry(url)
+    fresh_for = getattr(settings, "PDF_CACHE_FRESH_SECONDS", 24 * 3600)
+    if entry and time.time() - entry["checked_at"] < fresh_for:
+        metrics.incr("pdf_cache.hit")
+        touch(pdf_path)
+        return pdf_path
+
+    started = time.monotonic()
+    tmp = pdf_path.with_name(f"{pdf_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with get_scheduler().slot(url):
+            headers = conditional_headers(entry)
+            with get_session().get(url, stream=True, timeout=get_timeout(), headers=headers) as response:
+                if response.status_code == 304 and entry:
+                    metrics.incr("pdf_cache.revalidated")
+                    entry["checked_at"] = time.time()
+                    save_entry(url, entry)
+                    touch(pdf_path)
+                    return pdf_path
+                if response.status_code != 200:
+                    print(f"Download failed with HTTP {response.status_code}: {url}")
+                    return None
+                digest = hashlib.sha256()
+                with open(tmp, "wb") as f:
+                    for chunk in iter_body(response, "pdf", started):
+                        f.write(chunk)
+                        digest.update(chunk)
+                validators = response_validators(response)
+        os.replace(tmp, pdf_path)
+        save_entry(url, dict(validators, url=url, checked_at=time.time(), sha256=digest.hexdigest()))
+        metrics.incr("pdf_cache.miss")
+    except DownloadAborted as e:
+        print(f"⚠️ Download aborted ({e.reason}): {e}")
+        return None
+    except Exception as e:
+        metrics.incr("download.error.pdf")
+        print(f"Download error: {e}")
+        return None
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+    evict()
+    return pdf_path
+
+
+def content_hash(url, path):
+    """sha256 of a cached PDF's bytes; recorded at download time, computed for older entries."""
+    entry = load_entry(url)
+    if entry and entry.get("sha256"):
+        return entry["sha256"]
+    # Imported here: text_store needs the app registry, this module doesn't
+    from .text_store import file_sha256
+    digest = file_sha256(path)
+    if entry:
+        entry["sha256"] = digest
+        save_entry(url, entry)
+    return digest
+
+
+def evict(max_bytes=None):
+    """Deletes least recently used PDFs until the cache is back under 90% of PDF_CACHE_MAX_BYTES."""
+    max_bytes = max_bytes or getattr(settings, "PDF_CACHE_MAX_BYTES", 2 * 1024 ** 3)
+    if not _evict_lock.acquire(blocking=False):
+        return  # another thread is already evicting
+    try:
+        files = []
+        for path in get_cache_dir().glob("*/*.pdf"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        if total <= max_bytes:
+            return
+
+        evicted = 0
+        for _, size, path in sorted(files):
+            if total <= max_bytes * 0.9:
+                break
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        metrics.incr("pdf_cache.evicted", evicted)
+        print(f"🧹 Evicted {evicted} cached PDFs, cache is now {total // (1024 * 1024)} MB")
+    finally:
+        _evict_lock.release()
@@ -0,0 +1,100 @@
+"""
+PDF text extractors, run one document at a time in a child process so a slow or stuck
+extractor can be killed:
+
+    python -m data_engine.pdf_extractors <extractor> <path> [--find NAME ...] [--threshold SCORE] [--newest-first]
+
+Prints JSON: {"matches": {name: [page number, page text, score]}, "pages": [text, ...]}. With
+--find, reading stops once every name is found and "pages" (every page in document order)
+is only there when the whole document was read. Doesn't need Django.
+"""
+import argparse
+import json
+import mmap
+import sys
+from data_engine.matching import search_pages, DEFAULT_THRESHOLD
+
+
+def is_image_only(page):
+    """Cheap check for scanned pages: no fonts means no extractable text, so skip get_text()."""
+    return not page.get_fonts() and bool(page.get_images())
+
+
+def page_order(count, newest_first):
+    return range(count - 1, -1, -1) if newest_first else range(count)
+
+
+def pymupdf_pages(path, newest_first=False):
+    import fitz  # PyMuPDF
+    # Opened by path, MuPDF reads pages on demand through the OS page cache
+    with fitz.open(path, filetype="pdf") as doc:
+        for number in page_order(len(doc), newest_first):
+            page = doc[number]
+            yield number, "" if is_image_only(page) else page.get_text()
+
+
+def pdfplumber_pages(path, newest_first=False):
+    import pdfplumber
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with pdfplumber.open(mapped) as pdf:
+            for number in page_order(len(pdf.pages), newest_first):
+                yield number, pdf.pages[number].extract_text() or ""
+
+
+def pypdfium2_pages(path, newest_first=False):
+    import pypdfium2
+    doc = pypdfium2.PdfDocument(path)
+    try:
+        for number in page_order(len(doc), newest_first):
+            page = doc[number]
+            textpage = page.get_textpage()
+            try:
+                yield number, textpage.get_text_bounded()
+            finally:
+                # Also runs when the caller stops reading early and the generator is closed
+                textpage.close()
+                page.close()
+    finally:
+        doc.close()
+
+
+EXTRACTORS = {
+    "pymupdf": pymupdf_pages,
+    "pdfplumber": pdfplumber_pages,
+    "pypdfium2": pypdfium2_pages,
+}
+
+
+def run(extractor, path, needles=None, newest_first=False, threshold=DEFAULT_THRESHOLD):
+    """
+    Without needles, every page's text. With them, stops as soon as all are found; when
+    some aren't, every page has been read anyway, so their texts are returned too.
+    """
+    texts = {}
+    finished = []
+
+    def collect():
+        for number, text in EXTRACTORS[extractor](path, newest_first=newest_first):
+            texts[number] = text
+            yield number, text
+        finished.append(True)
+
+    matches = search_pages(collect(), needles or [], newest_first, threshold)
+    if needles and len(matches) == len(set(needles)) and not finished:
+        return {"matches": matches}
+    return {"matches": matches, "pages": [texts[n] for n in sorted(texts)]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("extractor", choices=sorted(EXTRACTORS))
+    parser.add_argument("path")
+    parser.add_argument("--find", action="append")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--newest-first", action="store_true")
+    args = parser.parse_args()
+    json.dump(run(args.extractor, args.path, args.find, args.newest_first, args.threshold), sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,248 @@
-import requests
-import fitz  # PyMuPDF
-import pdfplumber
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.conf import settings
+from .fetcher import get_executor
+from .pdf_cache import fetch_pdf, load_entry, content_hash
+from .pdf_screening import probe_pdf, rank_pdfs
+from .matching import search_pages, DEFAULT_THRESHOLD
+from . import metrics, text_store
 
-def download_pdf(url):
-    """Downloads the PDF from a URL."""
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.content
-    return None
+_extract_pool = None
 
-def extract_text_from_pdf(url):
-    """Extracts text from a given PDF URL using PyMuPDF and pdfplumber."""
-    pdf_data = download_pdf(url)
-    if not pdf_data:
-        return "Failed to download PDF."
+def get_match_threshold():
+    return getattr(settings, "NOTIFICATION_MATCH_THRESHOLD", DEFAULT_THRESHOLD)
 
-    text = ""
+def get_extractor_chain():
+    return getattr(settings, "PDF_EXTRACTOR_CHAIN", [("pymupdf", 20), ("pypdfium2", 20), ("pdfplumber", 60)])
 
+class ChildProcesses:
+    """Extractor processes started for one scan, killed together when the scan is over."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = set()
+        self.closed = False
+
+    def start(self, command):
+        """A started Popen, or None once the scan is over."""
+        with self.lock:
+            if self.closed:
+                return None
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=settings.BASE_DIR)
+            self.running.add(process)
+            return process
+
+    def finish(self, process):
+        with self.lock:
+            self.running.discard(process)
+
+    def kill_all(self):
+        with self.lock:
+            self.closed = True
+            for process in self.running:
+                process.kill()
+            killed = len(self.running)
+        if killed:
+            print(f"🛑 Killed {killed} PDF extractions no longer needed")
+
+def run_extractor(name, path, timeout, needles=None, newest_first=False, children=None):
+    """
+    Runs one extractor in a child process, killed after `timeout` seconds or when `children`
+    is killed. Returns its result (see pdf_extractors), or None if it failed, timed out or was
+    cancelled. Records timing and outcome per extractor.
+    """
+    children = children or ChildProcesses()
+    command = [sys.executable, "-m", "data_engine.pdf_extractors", name, str(path)]
+    for needle in needles or []:
+        command += ["--find", needle]
+    if needles:
+        command += ["--threshold", str(get_match_threshold())]
+    if newest_first:
+        command.append("--newest-first")
+
+    started = time.monotonic()
+    process = children.start(command)
+    if process is None:
+        return None
+    result, outcome = None, "ok"
     try:
-        with fitz.open(stream=pdf_data, filetype="pdf") as doc:
-            text = "\n".join(page.get_text() for page in doc)
-    except Exception:
-        pass
-
-    if not text:
-        try:
-            with pdfplumber.open(pdf_data) as pdf:
-                text = "\n".join(page.extract_text() for page in pdf.pages if page.extract_text())
-        except Exception:
-            return "Failed to extract text from PDF."
-
-    return text if text else "No readable text found in PDF."
+        stdout, stderr = process.communicate(timeout=timeout)
+        if children.closed:
+            return None  # killed because the scan is over: not the extractor's fault
+        if process.returncode == 0:
+            result = json.loads(stdout)
+        else:
+            outcome = "error"
+            error = stderr.decode(errors="replace").strip().splitlines()
+            print(f"PDF extractor {name} failed on {path}: {error[-1] if error else process.returncode}")
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+        outcome = "timeout"
+        print(f"⚠️ PDF extractor {name} killed after {timeout}s on {path}")
+    except ValueError as e:
+        outcome = "error"
+        print(f"PDF extractor {name} returned bad output for {path}: {e}")
+    finally:
+        children.finish(process)
+
+    if result is not None and not found_text(result):
+        outcome = "empty"
+    metrics.incr(f"pdf_extract.{name}.{outcome}")
+    metrics.incr(f"pdf_extract.{name}.ms", int((time.monotonic() - started) * 1000))
+    return result
+
+def found_text(result):
+    return bool(result["matches"]) or bool("".join(result.get("pages", [])).strip())
+
+def extract_with_chain(path, needles=None, newest_first=False, children=None):
+    """
+    Tries the extractors of PDF_EXTRACTOR_CHAIN in order until one finds text (or one of `needles`).
+    If they all come back empty, e.g. for a scanned document, returns the first empty result;
+    None if none of them could read the file.
+    """
+    empty = None
+    for name, timeout in get_extractor_chain():
+        if children is not None and children.closed:
+            return None
+        result = run_extractor(name, path, timeout, needles, newest_first, children)
+        if result is None:
+            continue
+        if found_text(result):
+            return result
+        empty = empty or result
+    return empty
+
+def search_stored_text(entry, needles):
+    """search_pages() over a document already in the text store."""
+    newest_first = getattr(settings, "PDF_SEARCH_NEWEST_FIRST", False)
+    pages = list(enumerate(entry.pages))
+    return search_pages(reversed(pages) if newest_first else pages, needles, newest_first, get_match_threshold())
+
+def pdf_contains(path, needles, children=None):
+    """
+    Runs in the extraction pool. Returns ({needle: (page, page text, score)}, page texts), stopping
+    as soon as every needle is found. When some aren't, every page has been read anyway,
+    so the page texts come back for the text store; otherwise they are None.
+    """
+    result = extract_with_chain(path, needles, getattr(settings, "PDF_SEARCH_NEWEST_FIRST", False), children)
+    if result is None:
+        raise RuntimeError("no extractor could read the file")
+    matches = {needle: tuple(match) for needle, match in result["matches"].items()}
+    return matches, result.get("pages")
+
+def get_extract_pool():
+    """
+    Threads that each drive one extractor child process at a time, so PDF_SCAN_PROCESSES
+    is the number of extractions running at once. Child processes are started with
+    subprocess, which also works inside Celery's daemonic prefork workers.
+    """
+    global _extract_pool
+    if _extract_pool is None:
+        workers = getattr(settings, "PDF_SCAN_PROCESSES", os.cpu_count() or 2) or 2
+        _extract_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-extract")
+    return _extract_pool
+
+def prepare_pdf(url):
+    """
+    Runs in the fetch pool: returns (local path, None), or (None, reason) for a PDF the
+    pre-screen turned down. Only PDFs we have never downloaded are probed first.
+    """
+    if load_entry(url) is None:
+        reason = probe_pdf(url)
+        if reason:
+            return None, reason
+    path = fetch_pdf(url)
+    return path, None if path else "failed"
+
+class PdfScanResult:
+    def __init__(self, matches=None, checked=None, unchecked=None, skipped=None):
+        self.matches = matches or {}  # {lowercased name: (PDF URL, 0-based page, page text, score)} for each name found
+        self.checked = checked or []  # PDFs fully searched within the budget
+        self.skipped = skipped or {}  # {url: reason} for PDFs passed over: too large, not a PDF or dead
+        self.unchecked = unchecked or []  # PDFs not searched: cancelled, failed or out of time
+
+    def match_for(self, name):
+        return self.matches.get(name.lower(), (None,) * 4)
+
+    def __repr__(self):
+        return (f"<PdfScanResult matches={len(self.matches)} checked={len(self.checked)} "
+                f"skipped={len(self.skipped)} unchecked={len(self.unchecked)}>")
+
+def scan_pdfs(pdf_urls, notification_names, budget=None, titles=None):
+    """
+    Searches PDFs for one or more notification names at once, most promising first (see
+    rank_pdfs), keeping PDF_SCAN_DOWNLOADS downloads in flight. Unknown PDFs are pre-screened.
+    A PDF whose bytes were fully extracted before, e.g. one unchanged since the last check,
+    is searched in the text store; others are extracted in the extraction pool. Stops
+    as soon as every name is found or the time budget runs out: queued work is cancelled and
+    running extractor processes are killed (a download already running finishes unused).
+    """
+    if isinstance(notification_names, str):
+        notification_names = [notification_names]
+    budget = budget or getattr(settings, "PDF_SCAN_BUDGET", 30)
+    window = getattr(settings, "PDF_SCAN_DOWNLOADS", 4)
+    deadline = time.monotonic() + budget
+    needles = list(dict.fromkeys(name.lower() for name in notification_names))
+    urls = rank_pdfs(list(dict.fromkeys(pdf_urls)), titles or {}, " ".join(needles))
+    queue = list(urls)
+    downloads = {}
+    extractions = {}
+    checked = []
+    skipped = {}
+    pending = set()
+    matches = {}
+    children = ChildProcesses()
+
+    while (pending or queue) and len(matches) < len(needles):
+        while queue and len(downloads) < window:
+            url = queue.pop(0)
+            future = get_executor().submit(prepare_pdf, url)
+            downloads[future] = url
+            pending.add(future)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            print(f"⚠️ Timed out checking PDFs after {budget}s.")
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            wanted = [needle for needle in needles if needle not in matches]
+            if future in downloads:
+                url = downloads.pop(future)
+                path, reason = future.result()
+                if reason and reason != "failed":
+                    skipped[url] = reason
+                if not path:
+                    continue
+                digest = content_hash(url, path)
+                stored = text_store.load(digest)
+                if stored is None:
+                    extraction = get_extract_pool().submit(pdf_contains, str(path), wanted, children)
+                    extractions[extraction] = (url, digest)
+                    pending.add(extraction)
+                    continue
+                metrics.incr("text_store.hit.pdf")
+                found = search_stored_text(stored, wanted)
+            else:
+                url, digest = extractions[future]
+                try:
+                    found, pages = future.result()
+                except Exception as e:
+                    print(f"PDF extraction error for {url}: {e}")
+                    continue
+                if pages is not None:
+                    text_store.save(digest, "pdf", url, pages)
+            checked.append(url)
+            for needle, (page, text, score) in found.items():
+                matches.setdefault(needle, (url, page, text, score))
+
+    for future in pending:
+        future.cancel()
+    children.kill_all()
+    unchecked = [url for url in urls if url not in checked and url not in skipped]
+    return PdfScanResult(matches, checked, unchecked, skipped)
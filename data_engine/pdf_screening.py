@@ -0,0 +1,106 @@
+import re
+from .fetcher import get_session, get_timeout, get_download_limits
+from .politeness import get_scheduler
+from . import metrics
+
+PROBE_BYTES = 1024
+CONTENT_RANGE_TOTAL = re.compile(r"/(\d+)\s*$")
+LINEARIZED_LENGTH = re.compile(rb"/Linearized\b.*?/L\s+(\d+)", re.S)
+
+# Dates in file names and link texts: 2026-10-18, 18.10.2026, 20261018, 18 Oct 2026, Oct 2026, 2026
+MONTHS = {m: i for i, m in enumerate(["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+DATE_PATTERNS = [
+    (re.compile(r"(20\d{2})[-_./](\d{1,2})[-_./](\d{1,2})"), lambda m: (int(m[1]), int(m[2]), int(m[3]))),
+    (re.compile(r"(\d{1,2})[-_./](\d{1,2})[-_./](20\d{2})"), lambda m: (int(m[3]), int(m[2]), int(m[1]))),
+    (re.compile(r"(?<!\d)(20\d{2})(\d{2})(\d{2})(?!\d)"), lambda m: (int(m[1]), int(m[2]), int(m[3]))),
+    (re.compile(r"(?:(\d{1,2})\W*)?(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\W*(20\d{2})", re.I),
+     lambda m: (int(m[3]), MONTHS[m[2].lower()], int(m[1] or 0))),
+    (re.compile(r"(?<!\d)(20\d{2})(?!\d)"), lambda m: (int(m[1]), 0, 0)),
+]
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def probe_pdf(url):
+    """
+    Checks a PDF before downloading it. Returns None if it looks worth downloading, otherwise
+    why not: "dead" (error status or no answer), "wrong_type" or "too_large".
+    Sends a HEAD request, and reads the first KB with a range request when HEAD is refused
+    or doesn't tell the type and size.
+    """
+    limits = get_download_limits("pdf")
+    session = get_session()
+    try:
+        with get_scheduler().slot(url):
+            response = session.head(url, timeout=get_timeout(), allow_redirects=True)
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            length = response.headers.get("Content-Length", "")
+            if response.status_code in (403, 405, 501) or not (content_type and length.isdigit()):
+                return probe_range(url, limits)
+    except Exception as e:
+        print(f"PDF probe error for {url}: {e}")
+        return screened_out(url, "dead")
+
+    if response.status_code >= 400:
+        return screened_out(url, "dead")
+    if limits["content_types"] and content_type not in limits["content_types"]:
+        return screened_out(url, "wrong_type")
+    if int(length) > limits["max_bytes"]:
+        return screened_out(url, "too_large")
+    return None
+
+
+def probe_range(url, limits):
+    """Reads the start of the file: the %PDF header, and the total size from Content-Range or the linearization dictionary."""
+    headers = {"Range": f"bytes=0-{PROBE_BYTES - 1}"}
+    with get_session().get(url, headers=headers, stream=True, timeout=get_timeout()) as response:
+        if response.status_code not in (200, 206):
+            return screened_out(url, "dead")
+        head = next(response.iter_content(PROBE_BYTES), b"")[:PROBE_BYTES]
+        total = CONTENT_RANGE_TOTAL.search(response.headers.get("Content-Range", ""))
+        length = response.headers.get("Content-Length", "")
+
+    if b"%PDF" not in head:
+        return screened_out(url, "wrong_type")
+    if total:
+        size = int(total[1])
+    elif response.status_code == 200 and length.isdigit():
+        size = int(length)
+    else:
+        linearized = LINEARIZED_LENGTH.search(head)
+        size = int(linearized[1]) if linearized else 0
+    if size > limits["max_bytes"]:
+        return screened_out(url, "too_large")
+    return None
+
+
+def screened_out(url, reason):
+    metrics.incr(f"pdf_screen.{reason}")
+    print(f"⏭️ Skipping PDF ({reason}): {url}")
+    return reason
+
+
+def link_date(text):
+    """The latest (year, month, day) found in a file name or link text, or (0, 0, 0)."""
+    found = [(0, 0, 0)]
+    for pattern, to_date in DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            year, month, day = to_date(match)
+            if month <= 12 and day <= 31:
+                found.append((year, month, day))
+    return max(found)
+
+
+def rank_pdfs(urls, titles, notification_name):
+    """
+    Orders PDF URLs so likely matches are fetched first: most words of the notification
+    name in the link text or file name, then the newest date in either, then page order.
+    """
+    wanted = set(WORD.findall(notification_name.lower()))
+
+    def score(item):
+        position, url = item
+        label = f"{titles.get(url, '')} {url.rsplit('/', 1)[-1]}"
+        words = set(WORD.findall(label.lower()))
+        return (-len(wanted & words), tuple(-part for part in link_date(label)), position)
+
+    return [url for _, url in sorted(enumerate(urls), key=score)]
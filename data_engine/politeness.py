@@ -0,0 +1,249 @@
+import asyncio
+import threading
+import time
+import uuid
+from contextlib import contextmanager, asynccontextmanager
+from urllib.parse import urlparse
+from django.conf import settings
+from protego import Protego
+
+USER_AGENT = "Mozilla/5.0"
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+_redis = None
+
+# Atomically refills the host's token bucket and takes a token plus an in-flight slot.
+# Slots are leased, so a worker that dies holding one doesn't block the host for good.
+ACQUIRE_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local rate, burst, cap, lease = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[5])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+if redis.call('ZCARD', KEYS[2]) >= cap then
+    return '0.05'
+end
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens < 1 then
+    wait = (1 - tokens) / rate
+else
+    tokens = tokens - 1
+    redis.call('ZADD', KEYS[2], now + lease, ARGV[4])
+    redis.call('EXPIRE', KEYS[2], math.ceil(lease) + 60)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return tostring(wait)
+"""
+
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        import redis
+        url = getattr(settings, "SCRAPER_POLITENESS_REDIS_URL", None) or settings.CELERY_BROKER_URL
+        _redis = redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=5)
+    return _redis
+
+
+def domain_of(url):
+    return urlparse(url).netloc.lower()
+
+
+class RobotsCache:
+    """Parsed robots.txt per origin, refreshed after ROBOTS_CACHE_TTL seconds."""
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl or getattr(settings, "ROBOTS_CACHE_TTL", 24 * 3600)
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, url):
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme or 'https'}://{parsed.netloc}"
+        with self.lock:
+            entry = self.entries.get(origin)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+
+        # Imported here: fetcher imports this module
+        from .fetcher import get_session
+        robots = None
+        try:
+            response = get_session().get(f"{origin}/robots.txt", timeout=5)
+            if response.status_code == 200:
+                robots = Protego.parse(response.text)
+        except Exception as e:
+            print(f"robots.txt error for {origin}: {e}")
+        with self.lock:
+            self.entries[origin] = (time.monotonic(), robots)
+        return robots
+
+    def crawl_delay(self, url):
+        """Seconds to leave between requests to this host, 0 if robots.txt does not say."""
+        robots = self.get(url)
+        if robots is None:
+            return 0
+        delay = robots.crawl_delay(USER_AGENT) or 0
+        rate = robots.request_rate(USER_AGENT)
+        if rate and rate.requests:
+            delay = max(delay, rate.seconds / rate.requests)
+        return delay
+
+
+class _DomainState:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.in_flight = 0
+        self.configured = False
+        self.configure_lock = threading.Lock()
+
+
+class DomainScheduler:
+    """
+    Per-domain politeness for every fetch in this process: a concurrency cap and a token
+    bucket per host, slowed further by any crawl-delay in the host's robots.txt.
+    try_acquire() never blocks, so async callers queue as coroutines and free hosts keep flowing.
+    """
+
+    def __init__(self, max_per_domain=None, rate=None, burst=None):
+        self.max_per_domain = max_per_domain or getattr(settings, "SCRAPER_MAX_PER_DOMAIN", 2)
+        self.rate = rate or getattr(settings, "SCRAPER_DOMAIN_RATE", 1.0)
+        self.burst = burst or getattr(settings, "SCRAPER_DOMAIN_BURST", 2)
+        self.robots = RobotsCache()
+        self.domains = {}
+        self.lock = threading.Lock()
+
+    def configure(self, url):
+        """Loads the robots.txt crawl-delay for the URL's host once. Blocking: call from a worker thread."""
+        domain = domain_of(url)
+        with self.lock:
+            state = self.domains.setdefault(domain, _DomainState(self.rate, self.burst))
+        with state.configure_lock:
+            if state.configured:
+                return
+            delay = self.robots.crawl_delay(url)
+            with self.lock:
+                if delay:
+                    state.rate = min(state.rate, 1 / delay)
+                    state.burst = 1
+                    state.tokens = min(state.tokens, 1)
+                    print(f"🐢 {domain} asks for a {delay:g}s crawl delay")
+                state.configured = True
+
+    def try_acquire(self, url):
+        """Takes a slot for the URL's host. Returns 0 on success, otherwise seconds to wait before retrying."""
+        domain = domain_of(url)
+        with self.lock:
+            state = self.domains.setdefault(domain, _DomainState(self.rate, self.burst))
+            now = time.monotonic()
+            state.tokens = min(state.burst, state.tokens + (now - state.updated) * state.rate)
+            state.updated = now
+            if state.in_flight >= self.max_per_domain:
+                return 0.05
+            if state.tokens < 1:
+                return (1 - state.tokens) / state.rate
+            state.tokens -= 1
+            state.in_flight += 1
+            return 0
+
+    def release(self, url):
+        with self.lock:
+            state = self.domains.get(domain_of(url))
+            if state and state.in_flight:
+                state.in_flight -= 1
+
+    def rate_of(self, domain):
+        """(rate, burst) for the host, as lowered by its robots.txt."""
+        with self.lock:
+            state = self.domains.setdefault(domain, _DomainState(self.rate, self.burst))
+            return state.rate, state.burst
+
+    @contextmanager
+    def slot(self, url):
+        """Blocking version for single fetches outside the async engine."""
+        self.configure(url)
+        while (wait := self.try_acquire(url)):
+            time.sleep(wait)
+        try:
+            yield
+        finally:
+            self.release(url)
+
+    @asynccontextmanager
+    async def async_slot(self, url, executor=None):
+        await asyncio.get_running_loop().run_in_executor(executor, self.configure, url)
+        while (wait := self.try_acquire(url)):
+            await asyncio.sleep(wait)
+        try:
+            yield
+        finally:
+            self.release(url)
+
+
+class SharedDomainScheduler(DomainScheduler):
+    """
+    DomainScheduler whose token buckets and in-flight counts live in Redis, so the limits
+    hold for every worker together rather than for each process. Fails open: without
+    Redis each process falls back to its own limits.
+    """
+
+    def __init__(self, *args, lease=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lease = lease or getattr(settings, "SCRAPER_SLOT_LEASE", 300)
+        self.held = {}  # domain: slot tokens this process holds in Redis
+        self.script = None
+        self.warned = False
+
+    def try_acquire(self, url):
+        import redis
+        domain = domain_of(url)
+        rate, burst = self.rate_of(domain)
+        token = uuid.uuid4().hex
+        try:
+            if self.script is None:
+                self.script = get_redis().register_script(ACQUIRE_SCRIPT)
+            wait = float(self.script(
+                keys=[f"politeness:{domain}:bucket", f"politeness:{domain}:in_flight"],
+                args=[rate, burst, self.max_per_domain, token, self.lease],
+            ))
+        except redis.RedisError as e:
+            if not self.warned:
+                self.warned = True
+                print(f"⚠️ Shared politeness limits unavailable, limiting per process: {e}")
+            return super().try_acquire(url)
+        if not wait:
+            with self.lock:
+                self.held.setdefault(domain, []).append(token)
+        return wait
+
+    def release(self, url):
+        import redis
+        domain = domain_of(url)
+        with self.lock:
+            tokens = self.held.get(domain)
+            token = tokens.pop() if tokens else None
+        if token is None:  # taken from the per-process fallback
+            return super().release(url)
+        try:
+            get_redis().zrem(f"politeness:{domain}:in_flight", token)
+        except redis.RedisError as e:
+            print(f"⚠️ Could not release a slot for {domain}, it expires in {self.lease}s: {e}")
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            if getattr(settings, "SCRAPER_POLITENESS_BACKEND", "redis") == "redis":
+                _scheduler = SharedDomainScheduler()
+            else:
+                _scheduler = DomainScheduler()
+        return _scheduler
@@ -0,0 +1,72 @@
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+
+# Weight of the newest interval in a page's running average time between changes
+CHANGE_INTERVAL_WEIGHT = 0.5
+
+
+def get_intervals():
+    return (
+        getattr(settings, "POLL_MIN_INTERVAL", 30 * 60),
+        getattr(settings, "POLL_DEFAULT_INTERVAL", 12 * 3600),
+        getattr(settings, "POLL_MAX_INTERVAL", 3 * 24 * 3600),
+    )
+
+
+def record_change(page, now):
+    """Folds the time since the page's previous change into its average change interval."""
+    if page.changed_at is None:
+        return
+    interval = (now - page.changed_at).total_seconds()
+    if page.change_interval is None:
+        page.change_interval = interval
+    else:
+        page.change_interval = CHANGE_INTERVAL_WEIGHT * interval + (1 - CHANGE_INTERVAL_WEIGHT) * page.change_interval
+
+
+def poll_interval(page, requests, now=None):
+    """
+    Seconds until a page should be checked again, for the active requests watching it:
+    - about twice per usual interval between its changes (POLL_DEFAULT_INTERVAL before
+      any change has been seen), and less often the longer it has been quiet since,
+    - less often the longer its youngest watcher has been waiting, past POLL_AGE_BACKOFF_DAYS,
+    - often when a watcher's expected_by deadline is near or recently passed,
+    kept between POLL_MIN_INTERVAL and POLL_MAX_INTERVAL.
+    """
+    now = now or timezone.now()
+    minimum, default, maximum = get_intervals()
+    interval = page.change_interval / 2 if page is not None and page.change_interval else default
+    if page is not None and page.changed_at:
+        # A page quiet for longer than it usually takes to change has probably slowed down
+        interval = max(interval, (now - page.changed_at).total_seconds() / 2)
+
+    if requests:
+        youngest = min((now - req.created_at).total_seconds() for req in requests) / 86400
+        backoff_days = getattr(settings, "POLL_AGE_BACKOFF_DAYS", 30)
+        if youngest > backoff_days:
+            interval *= youngest / backoff_days
+
+    grace = timedelta(days=getattr(settings, "POLL_DEADLINE_GRACE_DAYS", 7))
+    deadlines = [req.expected_by for req in requests if req.expected_by and req.expected_by + grace > now]
+    if deadlines:
+        left = (min(deadlines) - now).total_seconds()
+        # A quarter of the time left; once the date has passed, as often as allowed
+        interval = min(interval, left / 4) if left > 0 else minimum
+
+    return min(max(interval, minimum), maximum)
+
+
+def schedule_next_check(page, requests, now=None):
+    now = now or timezone.now()
+    page.next_check_at = now + timedelta(seconds=poll_interval(page, requests, now))
+    page.save(update_fields=["next_check_at"])
+    return page.next_check_at
+
+
+def is_due(page, requests, now=None):
+    """Unknown pages, pages whose time has come and pages with a watcher that was never checked are due."""
+    now = now or timezone.now()
+    if page is None or page.next_check_at is None or page.next_check_at <= now:
+        return True
+    return any(req.last_checked_at is None for req in requests)
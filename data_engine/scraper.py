@@ -1,43 +1,82 @@
 
 import threading
-import requests
-import re
 import time
-from urllib.parse import urlparse
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
-from .pdf_handler import extract_text_from_pdf
+from concurrent.futures import wait, FIRST_COMPLETED
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from playwright.async_api import TimeoutError as PlaywrightTimeout
+from .pdf_handler import scan_pdfs, get_match_threshold
 from .google_search import google_search_top_url
-from .models import ScraperChoice, NotificationPageMapping
-from scrapy.crawler import CrawlerProcess
-import scrapy
+from django.conf import settings
+from django.utils import timezone
+from .fetcher import get_session, get_executor, fetch_page
+from .change_detection import content_digest
+from .extraction import extract_page, pdf_link_titles
+from .browser_pool import get_browser_pool
+from .politeness import get_scheduler
+from .models import NotificationPageMapping, WatchedPage
+from .tool_selector import plan_tools, record_attempt, should_hedge
+from .crawl_service import crawl_urls
+from .matching import find_matches
+from .polling import record_change
+from .single_flight import single_flight
+from . import metrics, text_store
 
-class SimpleSpider(scrapy.Spider):
-    name = "simple_spider"
-    start_urls = []
+def record_page_fetch(url, result=None, text="", pdfs=None, pdf_titles=None):
+    """
+    Stores the validators and content digest of a successful fetch, and the page text in
+    the text store. The page counts as changed only when its normalized text differs from
+    the last fetch.
+    """
+    now = timezone.now()
+    page, _ = WatchedPage.objects.get_or_create(url=url)
+    page.last_fetched_at = now
+    if result is not None and result.not_modified:
+        page.save(update_fields=["last_fetched_at"])
+        return page
 
-    def __init__(self, url):
-        super().__init__()
-        self.start_urls = [url]
-        self.page_text = ""
-        self.pdf_links = []
+    digest = content_digest(text)
+    if digest != page.content_hash or page.changed_at is None:
+        record_change(page, now)
+        page.changed_at = now
+    page.content_hash = digest
+    page.etag = result.etag if result is not None else ""
+    page.last_modified = result.last_modified if result is not None else ""
+    page.content_length = result.content_length if result is not None else None
+    page.save()
+    pdf_titles = pdf_titles or {}
+    text_store.save(digest, "page", url, text, pdf_links=[[href, pdf_titles.get(href, "")] for href in pdfs or []])
+    return page
 
-    def parse(self, response):
-        self.page_text = response.text
-        self.pdf_links = response.css('a::attr(href)').re(r'.*\.pdf')
+def site_domain(domain_or_url):
+    """"nta.ac.in", "https://www.NTA.ac.in/" and "www.nta.ac.in/notices" are all the site nta.ac.in."""
+    value = domain_or_url.strip()
+    host = urlsplit(value if "://" in value else "//" + value).hostname or ""
+    return host.removeprefix("www.")
+
+def canonical_page_url(url):
+    """One spelling per page: https by default, lowercase scheme and host, no fragment."""
+    url = url.strip()
+    parts = urlsplit(url if "://" in url else "https://" + url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
 
 class UniversalScraper:
-    def __init__(self, domain_or_url, notification_name=None):
+    def __init__(self, domain_or_url, notification_name=None, checked_since=None):
         self.domain_or_url = domain_or_url
         self.notification_name = notification_name
-        self.session = requests.Session()
+        self.checked_since = checked_since  # when the caller last evaluated this page's content
+        self.session = get_session()
         self.text = ""
         self.pdfs = []
+        self.pdf_titles = {}  # link text per PDF href, to rank the PDFs
         self.load_url = ""
+        self.crawled = None  # this page's result from a batch crawl, used instead of crawling it again
+        self.unchanged = None  # "not_modified" or "same_content" when there is nothing new to check
+        self.pdf_scan = None
+        self.match_scores = {}  # name: how closely the best match resembles it, 1.0 for exact
 
     def detect_notification_page(self):
-        domain = urlparse(self.domain_or_url).netloc or self.domain_or_url.replace('https://', '').replace('http://', '')
-        mapping = NotificationPageMapping.objects.filter(domain=domain).first()
+        domain = site_domain(self.domain_or_url)
+        mapping = NotificationPageMapping.objects.filter(domain__in=[domain, f"www.{domain}"]).first()
 
         if mapping:
             print(f"✅ Found mapped notifications page: {mapping.notification_page_url}")
@@ -46,30 +85,64 @@ class UniversalScraper:
         print(f"🔍 No mapping found. Using Google search...")
         return None
 
-    def fast_scrape(self, url):
+    def fast_scrape(self, url, prefetched=None):
+        page = WatchedPage.objects.filter(url=url).first()
+        conditional = page is not None and page.has_validators() and page.unchanged_since(self.checked_since)
+
+        # A batch fetch already made the requests attempt for this page, unless it answered
+        # "not modified" on behalf of watchers that checked more recently than we did
+        if prefetched is not None and (conditional or not prefetched.not_modified):
+            return self.load_result(url, prefetched)
+        # The page is as we last stored it, we just haven't evaluated that version yet
+        if prefetched is not None and page is not None and self.load_snapshot(url, page, prefetched):
+            return True
         print(f"⚙️ Trying requests for {url}")
-        try:
-            response = self.session.get(url, timeout=10)  # 10 seconds timeout
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, "html.parser")
-                self.text = soup.get_text(separator="\n", strip=True)
-                self.pdfs = [link["href"] for link in soup.find_all("a", href=True) if link["href"].lower().endswith(".pdf")]
-                return True
-        except Exception as e:
-            print(f"Requests error: {e}")
-        return False
+        return self.load_result(url, fetch_page(url, validators=page.validators() if conditional else None))
+
+    def load_result(self, url, result):
+        """Takes the text and PDFs from a FetchResult, e.g. one prefetched in a batch."""
+        if result.error:
+            print(f"Requests error: {result.error}")
+        if result.not_modified:
+            print(f"💤 Page not modified since last check: {url}")
+            record_page_fetch(url, result)
+            self.unchanged = "not_modified"
+            return True
+        if not result.ok:
+            return False
+        self.text = result.text
+        self.pdfs = result.pdfs
+        self.pdf_titles = result.pdf_titles
+        self.record_fetch(url, result)
+        return True
+
+    def load_snapshot(self, url, page, result):
+        """Takes the text and PDFs of the stored version of an unmodified page instead of downloading it again."""
+        stored = text_store.load(page.content_hash)
+        if stored is None:
+            return False
+        print(f"📦 Using stored text of unmodified page: {url}")
+        metrics.incr("text_store.hit.page")
+        self.text = stored.text
+        self.pdfs = [href for href, _ in stored.pdf_links]
+        self.pdf_titles = {href: title for href, title in stored.pdf_links if title}
+        record_page_fetch(url, result)
+        return True
+
+    def record_fetch(self, url, result=None):
+        page = record_page_fetch(url, result, self.text, self.pdfs, self.pdf_titles)
+        if page.unchanged_since(self.checked_since):
+            print(f"💤 Page content unchanged since last check: {url}")
+            self.unchanged = "same_content"
 
     def playwright_scrape(self, url):
         print(f"⚙️ Trying playwright for {url}")
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                page.goto(url, timeout=20000)  # 20 seconds timeout
-                self.text = page.content()
-                self.pdfs = [a.get_attribute("href") for a in page.query_selector_all("a") if a.get_attribute("href") and a.get_attribute("href").lower().endswith(".pdf")]
-                browser.close()
-                return True
+            with get_scheduler().slot(url):
+                html, self.pdfs = get_browser_pool().render(url, timeout=20000)  # 20 seconds timeout
+            self.text, links = extract_page(html)
+            self.pdf_titles = pdf_link_titles(links)
+            return True
         except PlaywrightTimeout:
             print(f"Playwright timeout after 20 seconds.")
         except Exception as e:
@@ -79,22 +152,21 @@ class UniversalScraper:
     def scrapy_scrape(self, url):
         print(f"⚙️ Trying scrapy for {url}")
         try:
-            process = CrawlerProcess(settings={
-                "LOG_ENABLED": False,
-                "USER_AGENT": "Mozilla/5.0",
-            })
-            spider = SimpleSpider(url)
-            process.crawl(spider)
-            process.start()
-
-            self.text = spider.page_text
-            self.pdfs = spider.pdf_links
+            result = self.crawled if self.crawled is not None else crawl_urls([url])[url]
+            if result["error"]:
+                print(f"Scrapy error: {result['error']}")
+                return False
+            self.text = result["text"]
+            self.pdfs = result["pdfs"]
+            self.pdf_titles = result.get("pdf_titles", {})
             return True
+        except ConnectionError:
+            print(f"Scrapy crawl service is not running (manage.py run_crawl_service).")
         except Exception as e:
             print(f"Scrapy error: {e}")
         return False
 
-    def run_scraper(self):
+    def resolve_url(self):
         mapped_url = self.detect_notification_page()
 
         if mapped_url:
@@ -102,72 +174,165 @@ class UniversalScraper:
         else:
             url_to_scrape = google_search_top_url(self.domain_or_url)
 
-        parsed = urlparse(url_to_scrape)
-        if not parsed.scheme:
-            url_to_scrape = "https://" + url_to_scrape
+        # The same spelling as the scheduler's page_url, so fetch state and tool stats are shared
+        url_to_scrape = canonical_page_url(url_to_scrape)
 
         self.load_url = url_to_scrape
-        tool_record = ScraperChoice.objects.filter(url=url_to_scrape).first()
+        return url_to_scrape
 
-        if tool_record:
-            tool = tool_record.tool
-            print(f"🔍 Preferred scraping tool: {tool}")
+    def hedged_scrape(self, url):
+        """
+        Starts plain requests, then a browser render SCRAPER_HEDGE_DELAY seconds later if requests
+        has not produced a usable page. The first usable result wins and the browser render is
+        cancelled if it loses; a losing requests call cannot be interrupted and just finishes unused.
+        Returns (winning tool or None, tools that were tried).
+        """
+        delay = getattr(settings, "SCRAPER_HEDGE_DELAY", 2.0)
+        started = time.monotonic()
+        request_future = get_executor().submit(fetch_page, url)
+        wait([request_future], timeout=delay)
+        request_checked = request_future.done()
+        if request_checked and self.use_hedged_result("requests", url, request_future, started):
+            return "requests", ["requests"]
+
+        print(f"🏁 Hedging {url} with playwright after {time.monotonic() - started:.1f}s")
+        with get_scheduler().slot(url):
+            render_started = time.monotonic()
+            render_future = get_browser_pool().submit(url, timeout=20000)
+            pending = {render_future} if request_checked else {request_future, render_future}
+            while pending:
+                done, pending = wait(pending, timeout=30, return_when=FIRST_COMPLETED)
+                if not done:
+                    print(f"⚠️ Hedged fetch timed out.")
+                    break
+                for future in done:
+                    if future is request_future and self.use_hedged_result("requests", url, future, started):
+                        render_future.cancel()
+                        return "requests", ["requests", "playwright"]
+                    if future is render_future and self.use_hedged_result("playwright", url, future, render_started):
+                        return "playwright", ["requests", "playwright"]
+        render_future.cancel()
+        return None, ["requests", "playwright"]
+
+    def use_hedged_result(self, tool, url, future, started):
+        """Loads a finished hedge attempt into the scraper and records it. Returns True if it was usable."""
+        latency = time.monotonic() - started
+        if tool == "requests":
+            ok = self.load_result(url, future.result())
         else:
-            tool = None
+            try:
+                html, self.pdfs = future.result()
+                self.text, links = extract_page(html)
+                self.pdf_titles = pdf_link_titles(links)
+                self.record_fetch(url)
+                ok = True
+            except Exception as e:
+                print(f"Playwright error: {e}")
+                ok = False
+        record_attempt(url, tool, ok, latency)
+        return ok
 
-        # Smart switching logic
-        print(f"⚡ Attempting with: {tool or 'requests'}")
+    def scrape_with(self, tool, url, prefetched=None):
+        if tool == "requests":
+            return self.fast_scrape(url, prefetched)
+        if tool == "playwright":
+            ok = self.playwright_scrape(url)
+        else:
+            ok = self.scrapy_scrape(url)
+        if ok:
+            self.record_fetch(url)
+        return ok
 
-        if (tool == "requests" or tool is None) and self.fast_scrape(url_to_scrape):
-            if not tool_record:
-                ScraperChoice.objects.create(url=url_to_scrape, tool="requests")
-            return self.text, self.pdfs
+    def run_scraper(self, prefetched=None):
+        url_to_scrape = self.load_url or self.resolve_url()
 
-        if (tool == "playwright" or tool is None) and self.playwright_scrape(url_to_scrape):
-            if tool_record:
-                tool_record.tool = "playwright"
-                tool_record.save()
-            else:
-                ScraperChoice.objects.create(url=url_to_scrape, tool="playwright")
-            return self.text, self.pdfs
+        # Smart switching logic: cheapest tool likely to work first, heavier ones as fallback
+        tools = plan_tools(url_to_scrape)
+        print(f"⚡ Attempting with: {' → '.join(tools)}")
 
-        if (tool == "scrapy" or tool is None) and self.scrapy_scrape(url_to_scrape):
-            if tool_record:
-                tool_record.tool = "scrapy"
-                tool_record.save()
-            else:
-                ScraperChoice.objects.create(url=url_to_scrape, tool="scrapy")
-            return self.text, self.pdfs
+        if prefetched is None and self.crawled is None and should_hedge(url_to_scrape, tools):
+            winner, tried = self.hedged_scrape(url_to_scrape)
+            if winner:
+                return self.text, self.pdfs
+            tools = [tool for tool in tools if tool not in tried]
+
+        for tool in tools:
+            started = time.monotonic()
+            ok = self.scrape_with(tool, url_to_scrape, prefetched)
+            latency = time.monotonic() - started
+            if tool == "requests" and prefetched is not None:
+                latency = prefetched.elapsed
+            elif tool == "scrapy" and self.crawled is not None:
+                latency = self.crawled["elapsed"]
+            record_attempt(url_to_scrape, tool, ok, latency)
+            if ok:
+                return self.text, self.pdfs
 
         print(f"❌ All scraping methods failed.")
         return "", []
 
+    def run_scraper_shared(self):
+        """
+        run_scraper, except that concurrent callers for the same page share one fetch: the
+        others wait for it and take its text and PDFs, from memory in this process or from
+        the stored page snapshot in other workers.
+        """
+        url = self.load_url or self.resolve_url()
+        started = timezone.now()
+
+        def fetch():
+            self.run_scraper()
+            return self.text, self.pdfs, self.pdf_titles
+
+        (text, pdfs, pdf_titles), shared = single_flight(url, fetch, lambda: self.fetched_since(url, started))
+        if shared:
+            self.text, self.pdfs, self.pdf_titles = text, list(pdfs), dict(pdf_titles)
+        return self.text, self.pdfs
+
+    def fetched_since(self, url, since):
+        """(text, PDFs, PDF titles) of the page if it was fetched after `since`, from the text store; else None."""
+        page = WatchedPage.objects.filter(url=url, last_fetched_at__gte=since).first()
+        stored = text_store.load(page.content_hash) if page and page.content_hash else None
+        if stored is None:
+            return None
+        return stored.text, [href for href, _ in stored.pdf_links], {href: title for href, title in stored.pdf_links if title}
+
     def find_notification(self, notification_name):
-        print(f"🔎 Searching notification '{notification_name}' in scraped data...")
-
-        lower_text = self.text.lower()
-        matches = [m for m in re.finditer(re.escape(notification_name.lower()), lower_text)]
-
-        if matches:
-            print(f"✅ Found notification match in HTML text.")
-            match = matches[0]
-            start, end = max(match.start() - 300, 0), min(match.end() + 300, len(self.text))
-            snippet = self.text[start:end]
-            return snippet, None
-
-        print(f"🔍 Notification not found in HTML. Checking PDFs...")
-
-        start_time = time.time()
-        for pdf_link in self.pdfs:
-            if time.time() - start_time > 30:  # max 30 seconds total for all PDFs
-                print(f"⚠️ Timed out checking PDFs.")
-                break
-
-            full_pdf_url = pdf_link if pdf_link.startswith("http") else f"https://{urlparse(self.load_url).netloc}/{pdf_link.lstrip('/')}"
-            pdf_text = extract_text_from_pdf(full_pdf_url)
-            if pdf_text and notification_name.lower() in pdf_text.lower():
-                print(f"✅ Found inside PDF: {full_pdf_url}")
-                return None, full_pdf_url
-
-        print(f"❌ Notification not found after PDF checking.")
-        return None, None
+        return self.find_notifications([notification_name])[notification_name]
+
+    def find_notifications(self, notification_names):
+        """
+        Looks for every name at once: one pass over the page text, then one scan of the
+        linked PDFs for the names not on the page. Names match after normalization, or
+        fuzzily above NOTIFICATION_MATCH_THRESHOLD; scores end up in match_scores.
+        Returns {name: (snippet, pdf_url)}.
+        """
+        print(f"🔎 Searching {len(notification_names)} notification(s) in scraped data: {', '.join(notification_names)}")
+        results = {name: (None, None) for name in notification_names}
+        threshold = get_match_threshold()
+
+        for name, match in find_matches(self.text, notification_names, threshold).items():
+            print(f"✅ Found '{name}' in HTML text (score {match.score:.2f}).")
+            results[name] = (match.snippet(self.text), None)
+            self.match_scores[name] = match.score
+
+        missing = [name for name, (snippet, _) in results.items() if not snippet]
+        if not missing:
+            return results
+        print(f"🔍 {len(missing)} notification(s) not found in HTML. Checking PDFs...")
+
+        pdf_urls = [urljoin(self.load_url, pdf_link.strip()) for pdf_link in self.pdfs]
+        titles = {urljoin(self.load_url, href.strip()): title for href, title in self.pdf_titles.items()}
+        self.pdf_scan = scan_pdfs(pdf_urls, missing, titles=titles)
+        print(f"📄 Checked {len(self.pdf_scan.checked)} of {len(pdf_urls)} PDFs ({len(self.pdf_scan.skipped)} skipped)")
+
+        for name in missing:
+            pdf_url, page, text, score = self.pdf_scan.match_for(name)
+            if pdf_url:
+                print(f"✅ Found '{name}' inside PDF: {pdf_url} (page {page + 1}, score {score:.2f})")
+                match = find_matches(text or "", [name], threshold).get(name)
+                results[name] = (match.snippet(text) if match else None, pdf_url)
+                self.match_scores[name] = score
+            else:
+                print(f"❌ '{name}' not found after PDF checking.")
+        return results
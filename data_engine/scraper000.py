@@ -1,13 +1,13 @@
 import requests
-from bs4 import BeautifulSoup
-from .models import Notification
+from lxml import html as lxml_html
+from .ingest import ingest_notifications
 from urllib.parse import urljoin
 from datetime import datetime
 import os
 
 def scrap(url):
     """
-    Scrapes data from the given URL and saves notifications to the database.
+    Scrapes data from the given URL and saves new notifications to the database.
     """
     if url == "https://www.cusrinagar.edu.in/Notification/NotificationListPartial":
         base_url = "https://www.cusrinagar.edu.in"
@@ -21,43 +21,43 @@ def scrap(url):
         }
         
         response = requests.post(url, data=form_data)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        rows = soup.select("tbody tr")  
-        count = 0
+        root = lxml_html.fromstring(response.content)
+        rows = root.cssselect("tbody tr")
+        items = []
         for i, row in enumerate(rows):
-            tds = row.find_all("td")
-            posting_date_str = tds[1].get_text(strip=True)
+            tds = row.findall("td")
+            posting_date_str = tds[1].text_content().strip()
             try:
                 published_at = datetime.strptime(posting_date_str, "%d-%B-%Y")
             except Exception:
                 published_at = None
             
-            link = tds[2].find("a", title=True)
-            if link:
-                title = link["title"]
-                href = urljoin(base_url, link["href"])
+            link = next(iter(tds[2].xpath(".//a[@title]")), None)
+            if link is not None:
+                title = link.get("title")
+                href = urljoin(base_url, link.get("href", ""))
             else:
-                title = tds[0].get_text(strip=True)
+                title = tds[0].text_content().strip()
                 href = base_url
 
             print(f"{i+1}. {title} - {href}")
-            Notification.objects.create(title=title, url=href, published_at=published_at)
-            count += 1
+            items.append((title, href, published_at))
 
-        return f"Scraped and saved {count} notifications from {url}"
+        count = ingest_notifications(items)
+        return f"Scraped {len(items)} notifications from {url}, {count} new"
 
     
     elif url == "https://www.nta.ac.in/NoticeBoardArchive":
         base_url = "https://www.nta.ac.in"
         response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        title_elements = soup.find_all('content', style="color:#012B55")
-        pdf_links = [a for a in soup.find_all('a', href=True) if a['href'].strip().lower().endswith('.pdf')]
+        root = lxml_html.fromstring(response.content)
+        title_elements = root.xpath('//content[@style="color:#012B55"]')
+        pdf_links = [a for a in root.xpath('//a[@href]') if a.get('href').strip().lower().endswith('.pdf')]
         notifications = list(zip(title_elements, pdf_links))[2:22]
     
-        count = 0
+        items = []
         for title_elem, link in notifications:
-            title = title_elem.get_text(strip=True)
+            title = title_elem.text_content().strip()
             href = link.get('href', '').strip()
             absolute_href = urljoin(base_url, href) if href else ""
             
@@ -77,7 +77,7 @@ def scrap(url):
             print(f"Link: {absolute_href}")
             print(f"Published Date: {published_at}")
             
-            Notification.objects.create(title=title, url=absolute_href, published_at=published_at)
-            count += 1
+            items.append((title, absolute_href, published_at))
 
-        return f"Scraped and saved {count} notifications from {url}"
+        count = ingest_notifications(items)
+        return f"Scraped {len(items)} notifications from {url}, {count} new"
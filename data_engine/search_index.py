@@ -0,0 +1,139 @@
+from django.conf import settings
+from django.db import connection
+from .matching import TOKEN
+from .models import Notification
+
+FTS_TABLE = "data_engine_notification_fts"
+SYNC_TRIGGERS = {
+    f"{FTS_TABLE}_insert": f"""AFTER INSERT ON data_engine_notification BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, url) VALUES (new.id, new.title, new.url);
+    END""",
+    f"{FTS_TABLE}_delete": f"""AFTER DELETE ON data_engine_notification BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, url) VALUES ('delete', old.id, old.title, old.url);
+    END""",
+    f"{FTS_TABLE}_update": f"""AFTER UPDATE ON data_engine_notification BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, url) VALUES ('delete', old.id, old.title, old.url);
+        INSERT INTO {FTS_TABLE}(rowid, title, url) VALUES (new.id, new.title, new.url);
+    END""",
+}
+
+
+def is_number(word):
+    return any(char.isdigit() for char in word)
+
+
+def fts_terms(text):
+    """
+    Quoted terms for each word of `text`, so user input can't inject FTS5 syntax. Words are
+    prefixes ("admi" finds "admit"), numbers are exact ("semester 1" must not find "Semester 12").
+    """
+    return [f'"{word}"' if is_number(word) else f'"{word}"*' for word in TOKEN.findall(text.lower())]
+
+
+def keep_order(ids, queryset):
+    by_id = {notification.pk: notification for notification in queryset.filter(pk__in=ids)}
+    return [by_id[pk] for pk in ids if pk in by_id]
+
+
+class SearchBackend:
+    """Full-text search over Notification titles. Backends map it to their database's engine."""
+
+    def search(self, query, domain=None, limit=20):
+        """Notifications best matching every word of `query`, optionally only from URLs on `domain`."""
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Re-indexes every notification, e.g. after rows were written with raw SQL."""
+
+
+class SqliteFtsBackend(SearchBackend):
+    """
+    SQLite FTS5 table with Notification as its external content. Triggers (SYNC_TRIGGERS,
+    reinstalled after every migrate) keep it in sync with every insert, update and delete,
+    bulk_create included.
+    """
+
+    def search(self, query, domain=None, limit=20):
+        terms = fts_terms(query)
+        if not terms:
+            return []
+        match = " AND ".join(terms)
+        domain_terms = fts_terms(domain or "")
+        if domain_terms:
+            match = f"({match}) AND url : ({' AND '.join(domain_terms)})"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s",
+                [match, limit],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        return keep_order(ids, Notification.objects.all())
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    tsvector search for a future Postgres deployment. Computes the vector per query for now;
+    add a stored generated column with a GIN index before relying on it at scale.
+    """
+
+    def search(self, query, domain=None, limit=20):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+        words = TOKEN.findall(query.lower())
+        if not words:
+            return []
+        search_query = SearchQuery(" & ".join(word if is_number(word) else f"{word}:*" for word in words), search_type="raw")
+        queryset = Notification.objects.annotate(
+            rank=SearchRank(SearchVector("title", weight="A") + SearchVector("url", weight="D"), search_query),
+        ).filter(rank__gt=0)
+        if domain:
+            queryset = queryset.filter(url__icontains=domain)
+        return list(queryset.order_by("-rank")[:limit])
+
+
+class ScanSearchBackend(SearchBackend):
+    """icontains on every word: a full table scan, only for databases without a full-text engine."""
+
+    def search(self, query, domain=None, limit=20):
+        words = TOKEN.findall(query)
+        if not words:
+            return []
+        queryset = Notification.objects.all()
+        for word in words:
+            queryset = queryset.filter(title__icontains=word)
+        if domain:
+            queryset = queryset.filter(url__icontains=domain)
+        return list(queryset.order_by("-created_at")[:limit])
+
+
+BACKENDS = {
+    "sqlite": SqliteFtsBackend,
+    "postgresql": PostgresSearchBackend,
+    "scan": ScanSearchBackend,
+}
+
+
+def install_search_triggers(using="default", **kwargs):
+    """
+    post_migrate: SQLite drops a table's triggers whenever a migration rebuilds the table,
+    so the FTS sync triggers are put back after every migrate.
+    """
+    from django.db import connections
+    conn = connections[using]
+    if conn.vendor != "sqlite" or FTS_TABLE not in conn.introspection.table_names():
+        return
+    with conn.cursor() as cursor:
+        for name, body in SYNC_TRIGGERS.items():
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def get_backend():
+    name = getattr(settings, "NOTIFICATION_SEARCH_BACKEND", None) or connection.vendor
+    return BACKENDS.get(name, ScanSearchBackend)()
+
+
+def search_notifications(query, domain=None, limit=20):
+    return get_backend().search(query, domain=domain, limit=limit)
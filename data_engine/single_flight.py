@@ -0,0 +1,112 @@
+import threading
+from concurrent.futures import Future
+from django.conf import settings
+from . import metrics
+
+_flights = {}  # key: Future of the call in progress in this process
+_flights_lock = threading.Lock()
+_redis = None
+
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        import redis
+        url = getattr(settings, "SINGLE_FLIGHT_REDIS_URL", None) or settings.CELERY_BROKER_URL
+        _redis = redis.Redis.from_url(url, socket_timeout=5)
+    return _redis
+
+
+class RedisLock:
+    """
+    A lock shared by every worker, expiring after `ttl` seconds in case its holder dies.
+    Fails open: without Redis every caller just does its own work.
+    """
+
+    def __init__(self, key, ttl):
+        self.lock = get_redis().lock(f"single_flight:{key}", timeout=ttl)
+
+    def acquire(self, blocking=True, timeout=None):
+        import redis
+        try:
+            return self.lock.acquire(blocking=blocking, blocking_timeout=timeout)
+        except redis.RedisError as e:
+            print(f"⚠️ Single-flight lock unavailable: {e}")
+            return True
+
+    def release(self):
+        import redis
+        try:
+            self.lock.release()
+        except redis.RedisError:
+            pass  # expired, or Redis went away
+
+
+class LocalLock:
+    """Stand-in for RedisLock in tests and single-process runs: only callers in this process are coalesced."""
+
+    def __init__(self, key, ttl):
+        pass
+
+    def acquire(self, blocking=True, timeout=None):
+        return True
+
+    def release(self):
+        pass
+
+
+LOCKS = {
+    "redis": RedisLock,
+    "local": LocalLock,
+}
+
+
+def single_flight(key, compute, load_shared=None):
+    """
+    Runs compute() once for concurrent callers with the same key. Callers in this process
+    wait for the first one and get its result. Callers in other processes wait for its
+    lock, then take load_shared() (whatever the first caller left behind, or None) and
+    only compute themselves if there is nothing to take. Returns (result, shared).
+    """
+    with _flights_lock:
+        future = _flights.get(key)
+        leader = future is None
+        if leader:
+            future = _flights[key] = Future()
+    if not leader:
+        print(f"⏳ Joining the in-flight fetch of {key}")
+        metrics.incr("single_flight.shared")
+        return future.result(), True
+
+    try:
+        result, shared = _run_locked(key, compute, load_shared)
+        future.set_result(result)
+        return result, shared
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+
+
+def _run_locked(key, compute, load_shared):
+    ttl = getattr(settings, "SINGLE_FLIGHT_TTL", 120)
+    lock = LOCKS[getattr(settings, "SINGLE_FLIGHT_BACKEND", "redis")](key, ttl)
+    if lock.acquire(blocking=False):
+        try:
+            return compute(), False
+        finally:
+            lock.release()
+
+    print(f"⏳ Waiting for another worker's fetch of {key}")
+    acquired = lock.acquire(blocking=True, timeout=ttl)
+    try:
+        result = load_shared() if load_shared else None
+        if result is not None:
+            metrics.incr("single_flight.shared")
+            return result, True
+        return compute(), False
+    finally:
+        if acquired:
+            lock.release()
@@ -1,25 +1,76 @@
 
-import re
-from celery import shared_task
+import time
+import uuid
+from datetime import timedelta
+from celery import chord, shared_task
 from django.conf import settings
 from django.core.mail import send_mail
 from django.db import transaction
-from data_engine.scraper import UniversalScraper #scrap UniversalScraper
+from django.db.models import Q
+from data_engine.scraper import UniversalScraper, site_domain, canonical_page_url #scrap UniversalScraper
 from data_engine.ai_query import query_ai
-from data_engine.models import ScheduledNotificationRequest
+from data_engine.fetcher import fetch_pages
+from data_engine.crawl_service import crawl_urls
+from data_engine.tool_selector import plan_tools
+from data_engine import text_store
+from data_engine.polling import schedule_next_check, is_due
+from data_engine.matching import name_tokens
+from data_engine.models import ScheduledNotificationRequest, WatchedPage, NotificationPageMapping, ChatScrapeJob
+from django.utils import timezone
+
+NOT_FOUND_MESSAGE = "📢 Notification not fully available yet, but monitoring has started."
+UNCHANGED_MESSAGE = "📢 No changes on the page since the last check, still monitoring."
 
 @shared_task
-def scrape_notification(domain_or_url, notification_name):
+def scrape_notification(domain_or_url, notification_name, report=None):
     print(f"Scraping: {notification_name} from {domain_or_url}")
 
     scraper = UniversalScraper(domain_or_url, notification_name)
-    html_text, pdf_links = scraper.run_scraper()
-    print(f"→ Text length: {len(html_text)} chars, PDFs: {pdf_links}")
+    return summarize_notification(scraper, domain_or_url, notification_name, report=report)
 
-    snippet, pdf_url = scraper.find_notification(notification_name)
+def start_chat_scrape(domain, notification_name, user=None):
+    """
+    Queues a chatbot scrape on the "chat" queue, whose workers have a fixed concurrency.
+    Returns the job, or None when CHAT_SCRAPE_MAX_PENDING jobs are already waiting or
+    running. Jobs silent for CHAT_SCRAPE_STALE_SECONDS are assumed dead and not counted.
+    """
+    stale = timezone.now() - timedelta(seconds=getattr(settings, "CHAT_SCRAPE_STALE_SECONDS", 15 * 60))
+    pending = ChatScrapeJob.objects.filter(status__in=["queued", "running"], updated_at__gte=stale).count()
+    if pending >= getattr(settings, "CHAT_SCRAPE_MAX_PENDING", 20):
+        print(f"🚦 {pending} chat scrapes pending, not queueing {notification_name} on {domain}")
+        return None
+    job = ChatScrapeJob.objects.create(domain=domain, notification_name=notification_name, user=user, progress="Waiting for a free worker")
+    run_chat_scrape.delay(str(job.pk))
+    return job
 
-    if snippet:
-        prompt = f"""
+@shared_task
+def run_chat_scrape(job_id):
+    """Runs a chatbot scrape, reporting each step on its job; a found notification is e-mailed and stops its scheduled checks."""
+    job = ChatScrapeJob.objects.select_related("user").get(pk=job_id)
+    try:
+        summary = scrape_notification(job.domain, job.notification_name, report=job.report)
+    except Exception as e:
+        print(f"❌ Chat scrape failed: {e}")
+        job.report("Something went wrong, the scheduled checks will keep looking", status="failed")
+        raise
+    job.report("Finished", status="done", summary=summary)
+
+    if summary and summary != NOT_FOUND_MESSAGE:
+        ScheduledNotificationRequest.objects.filter(
+            user=job.user, domain_or_url=job.domain, notification_name=job.notification_name, active=True,
+        ).update(active=False)
+        if job.user and job.user.email:
+            send_mail(
+                f"✅ Notification Found: {job.notification_name}",
+                summary,
+                settings.DEFAULT_FROM_EMAIL,
+                [job.user.email],
+                fail_silently=True,
+            )
+    return summary
+
+def summary_prompt(domain_or_url, notification_name, snippet):
+    return f"""
 Below is a part of content scraped from {domain_or_url} related to user's query "{notification_name}":
 
 \"\"\"
@@ -34,30 +85,288 @@ Please do the following:
 
 Respond only the final summary to show to the user.
 """
+
+def summarize_notification(scraper, domain_or_url, notification_name, prefetched=None, report=None):
+    """`report`, if given, is called with a short description of each step as it starts."""
+    report = report or (lambda progress: None)
+    report("Fetching the notifications page")
+    # A prefetched page was fetched for every watcher already; otherwise join any fetch of it in flight
+    html_text, pdf_links = scraper.run_scraper(prefetched) if prefetched is not None else scraper.run_scraper_shared()
+    if scraper.unchanged:
+        return UNCHANGED_MESSAGE
+    print(f"→ Text length: {len(html_text)} chars, PDFs: {pdf_links}")
+
+    report(f"Searching the page and {len(pdf_links)} linked PDFs")
+    snippet, pdf_url = scraper.find_notification(notification_name)
+    if snippet:
+        report("Writing the summary")
+    return summarize_match(domain_or_url, notification_name, snippet, pdf_url)
+
+def summarize_match(domain_or_url, notification_name, snippet, pdf_url):
+    if snippet:
         print("→ Prompting AI for Summary...")
-        summary = query_ai(prompt).strip()
+        summary = query_ai(summary_prompt(domain_or_url, notification_name, snippet)).strip()
         print("→ AI says:", summary)
 
+        if pdf_url and summary:
+            return f"✅ Notification found inside PDF.\n\n{summary}\n\n🔗 PDF Link: {pdf_url}"
+        if pdf_url:
+            return f"✅ Notification found inside PDF.\n\n🔗 PDF Link: {pdf_url}"
         return summary if summary else "📢 No specific update found yet, but our system is monitoring it for you!"
 
     if pdf_url:
         return f"✅ Notification found inside PDF.\n\n🔗 PDF Link: {pdf_url}"
 
-    return "📢 Notification not fully available yet, but monitoring has started."
+    return NOT_FOUND_MESSAGE
+
+def check_page(url, requests, prefetched=None, crawled=None):
+    """
+    Scrapes one page once for every request watching it and matches all their notification
+    names in one pass. `prefetched` and `crawled` are the page's result from a batch fetch or crawl. Returns {request pk: (message, why it was unchanged or None, complete)}:
+    a check is only complete when the page loaded and, for a name not found, every linked
+    PDF was searched. Incomplete checks must not count as having seen this version.
+    """
+    checked = [req.last_checked_at for req in requests]
+    # Judged against the watcher that checked longest ago, so nobody misses a change
+    oldest = None if None in checked else min(checked)
+    scraper = UniversalScraper(requests[0].domain_or_url, checked_since=oldest)
+    scraper.load_url = url
+    scraper.crawled = crawled
+    html_text, pdf_links = scraper.run_scraper(prefetched)
+    if scraper.unchanged:
+        return {req.pk: (UNCHANGED_MESSAGE, scraper.unchanged, True) for req in requests}
+    if not html_text:
+        return {req.pk: (NOT_FOUND_MESSAGE, None, False) for req in requests}
+    print(f"→ Text length: {len(html_text)} chars, PDFs: {pdf_links}")
+
+    page = WatchedPage.objects.filter(url=url).first()
+    results = {}
+    due = []
+    for req in requests:
+        if page is not None and page.unchanged_since(req.last_checked_at):
+            results[req.pk] = (UNCHANGED_MESSAGE, "same_content", True)
+        else:
+            due.append(req)
+
+    found = scraper.find_notifications(list(dict.fromkeys(req.notification_name for req in due)))
+    # PDFs left unsearched (out of time, failed) may hold the names not found
+    pdfs_left = scraper.pdf_scan is not None and bool(scraper.pdf_scan.unchecked)
+    summaries = {}  # watchers of the same name on the same page share one summary, however they wrote it
+    for req in due:
+        key = name_tokens(req.notification_name)
+        snippet, pdf_url = found[req.notification_name]
+        if key not in summaries:
+            summaries[key] = summarize_match(req.domain_or_url, req.notification_name, snippet, pdf_url)
+        results[req.pk] = (summaries[key], None, bool(snippet or pdf_url) or not pdfs_left)
+    return results
+
+def batch_validators(watchers):
+    """
+    Conditional-request validators per page, only for pages every watcher has already
+    evaluated in their current version (one stale watcher needs the full page).
+    `watchers` is {page url: [requests watching it]}.
+    """
+    validators = {}
+    for page in WatchedPage.objects.filter(url__in=watchers.keys()):
+        if page.has_validators() and all(page.unchanged_since(req.last_checked_at) for req in watchers[page.url]):
+            validators[page.url] = page.validators()
+    return validators
+
+def claim_requests(request_ids):
+    """
+    Leases the still-active rows of `request_ids` to the caller with a single UPDATE, so two
+    workers never check the same request. A lease left behind by a crashed worker expires
+    after CHECK_CLAIM_SECONDS. Returns the claimed requests.
+    """
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, "CHECK_CLAIM_SECONDS", 30 * 60))
+    ScheduledNotificationRequest.objects.filter(pk__in=request_ids, active=True).filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+    ).update(claim_token=token, claimed_until=now + lease)
+    return list(ScheduledNotificationRequest.objects.select_related("user").filter(claim_token=token))
+
+def release_requests(requests):
+    ScheduledNotificationRequest.objects.filter(
+        pk__in=[req.pk for req in requests], claim_token=requests[0].claim_token,
+    ).update(claim_token="", claimed_until=None)
+
+def record_result(req, res, unchanged, complete, stats):
+    """
+    Saves one request's outcome and releases its lease; the e-mail goes out after the row is saved.
+    last_checked_at only moves on after a complete check, so an incomplete one is redone next cycle.
+    """
+    stats["checked"] += 1
+    req.claim_token = ""
+    req.claimed_until = None
+    fields = ["claim_token", "claimed_until"]
+    found = not unchanged and res and res != NOT_FOUND_MESSAGE
+    if complete or found:
+        req.last_checked_at = timezone.now()
+        fields.append("last_checked_at")
+    else:
+        stats["incomplete"] += 1
+    if unchanged:
+        stats[unchanged] += 1
+    elif found:
+        stats["found"] += 1
+        req.active = False
+        fields.append("active")
+    with transaction.atomic():
+        req.save(update_fields=fields)
+
+    if found and req.user and req.user.email:
+        send_mail(
+            subject=f"Notification Found: {req.notification_name}",
+            message=res,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[req.user.email],
+            fail_silently=True,
+        )
+
+def new_stats():
+    return {"checked": 0, "pages": 0, "not_modified": 0, "same_content": 0, "found": 0, "incomplete": 0}
+
+def prefetch_pages(watchers):
+    """
+    Downloads a batch of pages at once with the cheapest tool planned for each: one
+    concurrent fetch for the plain-requests pages, one crawl for the scrapy pages. Pages
+    whose stats say only the browser works are left to the scraper.
+    Returns ({url: FetchResult}, {url: crawl result}).
+    """
+    first_tool = {url: plan_tools(url)[0] for url in watchers}
+    fetch = [url for url, tool in first_tool.items() if tool == "requests"]
+    crawl = [url for url, tool in first_tool.items() if tool == "scrapy"]
+    prefetched = fetch_pages(fetch, validators=batch_validators({url: watchers[url] for url in fetch}))
+    crawled = {}
+    if crawl:
+        started = time.monotonic()
+        try:
+            crawled = crawl_urls(crawl)
+        except Exception as e:
+            print(f"⚠️ Batch crawl failed, pages will be scraped one by one: {e}")
+        for result in crawled.values():
+            result.setdefault("elapsed", time.monotonic() - started)
+    return prefetched, crawled
+
+@shared_task
+def check_watched_pages(pages):
+    """
+    A chunk of a scheduled check: claims the requests of every page in `pages` ({url: request
+    pks}), downloads the pages as one batch and then checks them one by one. A page that
+    fails is released for the next cycle without holding up the rest of the chunk.
+    """
+    stats = new_stats()
+    watchers = {}
+    for url, request_ids in pages.items():
+        requests = claim_requests(request_ids)
+        if requests:
+            watchers[url] = requests
+    if not watchers:
+        return stats
+    try:
+        prefetched, crawled = prefetch_pages(watchers)
+    except Exception:
+        for requests in watchers.values():
+            release_requests(requests)
+        raise
+
+    for url, requests in watchers.items():
+        try:
+            page_stats = check_watched_page(url, requests, prefetched.get(url), crawled.get(url))
+        except Exception as e:
+            print(f"⚠️ Check of {url} failed: {e}")
+            continue
+        for key, value in page_stats.items():
+            stats[key] += value
+    return stats
+
+def check_watched_page(url, requests, prefetched=None, crawled=None):
+    """One page of a scheduled check: scrapes the page once for its claimed requests and records every result."""
+    stats = new_stats()
+    try:
+        results = check_page(url, requests, prefetched, crawled)
+    except Exception:
+        release_requests(requests)
+        raise
+
+    stats["pages"] += 1
+    for req in requests:
+        res, unchanged, complete = results[req.pk]
+        record_result(req, res, unchanged, complete, stats)
+    page, _ = WatchedPage.objects.get_or_create(url=url)
+    schedule_next_check(page, [req for req in requests if req.active])
+    return stats
+
+@shared_task
+def report_check_stats(results):
+    stats = new_stats()
+    for page_stats in results:
+        for key, value in page_stats.items():
+            stats[key] = stats.get(key, 0) + value
+    print(f"📊 Scheduled check: {stats}")
+    return stats
+
+def canonicalize_requests(requests):
+    """
+    Maps each request to the notifications page it resolves to and stores that in page_url.
+    Spellings of the same site ("nta.ac.in", "https://www.nta.ac.in/") share one resolution,
+    a NotificationPageMapping always wins, and a page found by Google search is kept for
+    later cycles instead of being searched again. Returns {page url: [request pks]}.
+    """
+    mappings = {site_domain(mapping.domain): mapping.notification_page_url for mapping in NotificationPageMapping.objects.all()}
+    resolved = {}
+    for req in requests:
+        site = site_domain(req.domain_or_url) or req.domain_or_url
+        if req.page_url and site not in mappings:
+            resolved.setdefault(site, req.page_url)
+
+    watchers = {}
+    for req in requests:
+        site = site_domain(req.domain_or_url) or req.domain_or_url
+        if site in mappings:
+            url = mappings[site]
+        else:
+            if site not in resolved:
+                resolved[site] = UniversalScraper(req.domain_or_url, req.notification_name).resolve_url()
+            url = resolved[site]
+        url = canonical_page_url(url)
+        if req.page_url != url:
+            req.page_url = url
+            req.save(update_fields=["page_url"])
+        watchers.setdefault(url, []).append(req.pk)
+    return watchers
 
 @shared_task
 def check_scheduled_requests():
-    with transaction.atomic():
-        for req in ScheduledNotificationRequest.objects.select_for_update().filter(active=True):
-            res = scrape_notification(req.domain_or_url, req.notification_name)
-            if res and not res.startswith("📢 Notification not fully available yet"):
-                if req.user and req.user.email:
-                    send_mail(
-                        subject=f"Notification Found: {req.notification_name}",
-                        message=res,
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        recipient_list=[req.user.email],
-                        fail_silently=True,
-                    )
-                req.active = False
-                req.save()
+    """
+    Plans a check cycle without holding any lock: groups the active requests by their
+    canonical page and fans out the pages that are due (see polling.poll_interval) in
+    chunks of CHECK_PAGES_PER_TASK, so each page is fetched once, each chunk is fetched
+    as one batch and the cycle is spread over every worker. The stats are reported once
+    all chunks are done.
+    """
+    active = {req.pk: req for req in ScheduledNotificationRequest.objects.filter(active=True)}
+    watchers = canonicalize_requests(list(active.values()))
+    pages = {page.url: page for page in WatchedPage.objects.filter(url__in=watchers.keys())}
+    now = timezone.now()
+    due = {url: ids for url, ids in watchers.items() if is_due(pages.get(url), [active[pk] for pk in ids], now)}
+    if not due:
+        return 0
+
+    # Not due again until the claim lease runs out, in case this check never finishes
+    lease = timedelta(seconds=getattr(settings, "CHECK_CLAIM_SECONDS", 30 * 60))
+    WatchedPage.objects.filter(url__in=due.keys()).update(next_check_at=now + lease)
+    urls = list(due)
+    size = getattr(settings, "CHECK_PAGES_PER_TASK", 20)
+    chunks = [{url: due[url] for url in urls[i:i + size]} for i in range(0, len(urls), size)]
+    chord(check_watched_pages.s(chunk) for chunk in chunks)(report_check_stats.s())
+    print(f"🗂️ Dispatched checks of {len(due)} of {len(watchers)} watched pages in {len(chunks)} tasks")
+    return len(due)
+
+@shared_task
+def prune_text_store():
+    """Drops extracted texts nobody has used within the retention period."""
+    deleted = text_store.prune()
+    print(f"🧹 Pruned {deleted} stored texts")
+    return deleted
@@ -1,3 +1,397 @@
-from django.test import TestCase
+import random
+import sys
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from .change_detection import content_digest, normalize_text
+from .extraction import extract_with_lxml, extract_with_soup
+from .ingest import ingest_notifications
+from .matching import PatternMatcher, find_matches
+from .models import Notification, NotificationPageMapping, ScheduledNotificationRequest, WatchedPage
+from .politeness import DomainScheduler, SharedDomainScheduler
+from .polling import poll_interval
+from .scraper import UniversalScraper
+from .search_index import search_notifications
+from .single_flight import LOCKS, single_flight
+from .pdf_handler import ChildProcesses, PdfScanResult
+from .tasks import UNCHANGED_MESSAGE, canonicalize_requests, check_page, check_watched_pages, claim_requests
+from . import metrics, text_store
+
+
+class FuzzyMatchTests(SimpleTestCase):
+    def test_close_spelling_matches(self):
+        found = find_matches("Latest: Admit Card for Semster Examinaton 2025 released", ["Admit Card for Semester Examination 2025"])
+        self.assertIn("Admit Card for Semester Examination 2025", found)
+
+    def test_ordinal_must_match_exactly(self):
+        text = "Date sheet for MBA Third Semester Examination. Notice 5 of the session."
+        self.assertEqual(find_matches(text, ["Date sheet for MBA Fifth Semester Examination"]), {})
+
+    def test_ordinal_spellings_are_equivalent(self):
+        text = "Date sheet for MBA 5th Semester Examination"
+        self.assertIn("Date sheet for MBA Fifth Semester Examination", find_matches(text, ["Date sheet for MBA Fifth Semester Examination"]))
+
+    def test_every_word_must_be_present(self):
+        text = "Admit Card for MCA Entrance released. Admissions open for the MBA programme."
+        self.assertEqual(find_matches(text, ["Admit Card for MBA Entrance"]), {})
+
+    def test_acronyms_must_match_exactly(self):
+        self.assertEqual(find_matches("Result of BCom Semester exam", ["Result of BSc Semester exam"]), {})
+
+    def test_year_must_match_exactly(self):
+        text = "Admit Card for Semester Examination 2024. Session 2025 begins soon."
+        self.assertEqual(find_matches(text, ["Admit Card for Semester Examination 2025"]), {})
+
+
+class IngestTests(TestCase):
+    def test_rerun_and_url_spellings_do_not_duplicate(self):
+        items = [
+            ("Admit Card", "https://www.nta.ac.in/a.pdf", None),
+            ("admit  card", "http://nta.ac.in/a.pdf/", None),
+            ("Result", "https://nta.ac.in/r.pdf", None),
+        ]
+        self.assertEqual(ingest_notifications(items), 2)
+        self.assertEqual(ingest_notifications(items + [("New", "https://nta.ac.in/n.pdf", None)]), 1)
+        self.assertEqual(Notification.objects.count(), 3)
+
+
+class ClaimRequestsTests(TestCase):
+    def test_rows_are_claimed_once_until_the_lease_expires(self):
+        ids = [ScheduledNotificationRequest.objects.create(domain_or_url="nta.ac.in", notification_name=name).pk for name in ("a", "b")]
+        ScheduledNotificationRequest.objects.create(domain_or_url="nta.ac.in", notification_name="done", active=False)
+
+        self.assertEqual(len(claim_requests(ids)), 2)
+        self.assertEqual(claim_requests(ids), [])
+
+        ScheduledNotificationRequest.objects.filter(pk=ids[0]).update(claimed_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual([req.pk for req in claim_requests(ids)], [ids[0]])
+
+
+class ChangeDetectionTests(SimpleTestCase):
+    def test_timestamps_are_ignored(self):
+        self.assertEqual(
+            content_digest("Notices\nLast updated: 18 Oct 2026 10:22 AM\nAdmit Card"),
+            content_digest("Notices\nLast updated: 19 Oct 2026 09:05 AM\nAdmit Card"),
+        )
+
+    def test_notice_after_update_label_is_kept(self):
+        text = normalize_text("Notices\nUpdated on 18-10-2025: Admit Card 2025 released")
+        self.assertIn("admit card 2025 released", text)
+        self.assertNotIn("18-10-2025", text)
+
+
+class SearchTests(TestCase):
+    def test_numbers_are_not_prefixes(self):
+        Notification.objects.create(title="Result of Semester 12 declared", url="https://cusrinagar.edu.in/r12.pdf")
+        Notification.objects.create(title="Result of Semester 1 declared", url="https://cusrinagar.edu.in/r1.pdf")
+        self.assertEqual([n.title for n in search_notifications("result semester 1")], ["Result of Semester 1 declared"])
+        self.assertEqual(len(search_notifications("resu semes")), 2)
+
+
+class PollIntervalTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.page = WatchedPage(url="https://nta.ac.in/notices", changed_at=self.now)
+        self.request = ScheduledNotificationRequest.objects.create(domain_or_url="nta.ac.in", notification_name="Admit Card")
+
+    def interval(self):
+        return poll_interval(self.page, [self.request], self.now)
+
+    def test_quiet_page_backs_off(self):
+        fresh = self.interval()
+        self.page.changed_at = self.now - timedelta(days=4)
+        self.assertGreater(self.interval(), fresh)
+
+    def test_near_deadline_polls_often(self):
+        self.request.expected_by = self.now + timedelta(hours=4)
+        self.assertLessEqual(self.interval(), 3600)
+
+
+class ResolveUrlTests(TestCase):
+    def test_chat_and_scheduler_use_the_same_page_url(self):
+        NotificationPageMapping.objects.create(domain="nta.ac.in", notification_page_url="HTTPS://WWW.NTA.ac.in/Notices#latest")
+        req = ScheduledNotificationRequest.objects.create(domain_or_url="https://www.nta.ac.in/", notification_name="Admit Card")
+        self.assertEqual(list(canonicalize_requests([req])), [UniversalScraper("nta.ac.in").resolve_url()])
+
+
+class TextStoreTests(TestCase):
+    def test_existing_text_is_not_compressed_again(self):
+        entry = text_store.save("a" * 64, "page", "https://nta.ac.in/notices", "Admit Card 2025")
+        with mock.patch("data_engine.text_store.zlib.compress") as compress:
+            self.assertEqual(text_store.save("a" * 64, "page", "https://nta.ac.in/notices", "Admit Card 2025").pk, entry.pk)
+        compress.assert_not_called()
+        self.assertEqual(entry.text, "Admit Card 2025")
+
+
+class ExtractionTests(SimpleTestCase):
+    def test_both_parsers_give_the_same_links(self):
+        page = b'<html><body><p>Notices</p><a href="a.pdf">View\n   Detail</a><a href="b.pdf"><b>Admit</b> Card\n<i>2025</i></a></body></html>'
+        self.assertEqual(extract_with_soup(page)[1], extract_with_lxml(page)[1])
+        self.assertEqual(extract_with_lxml(page)[1][0], ("a.pdf", "View Detail"))
+
+
+
+class BusyLock:
+    """A lock another worker holds until the first blocking acquire."""
+
+    def __init__(self, key, ttl):
+        pass
+
+    def acquire(self, blocking=True, timeout=None):
+        return blocking
+
+    def release(self):
+        pass
+
+
+@override_settings(SINGLE_FLIGHT_BACKEND="local")
+class SingleFlightTests(SimpleTestCase):
+    def run_concurrently(self, key, compute, callers=5):
+        """Starts `callers` threads on one key and lets the leader's compute() finish once the others have joined."""
+        joined = []
+        results = []
+        release = threading.Event()
+
+        def leader_compute():
+            release.wait(5)
+            return compute()
+
+        def call():
+            try:
+                results.append(single_flight(key, leader_compute))
+            except Exception as e:
+                results.append(e)
+
+        with mock.patch("data_engine.single_flight.metrics.incr", side_effect=lambda name: joined.append(name)):
+            threads = [threading.Thread(target=call) for _ in range(callers)]
+            for thread in threads:
+                thread.start()
+            deadline = time.monotonic() + 5
+            while len(joined) < callers - 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            release.set()
+            for thread in threads:
+                thread.join(5)
+        return results
+
+    def test_concurrent_callers_share_one_computation(self):
+        calls = []
+        results = self.run_concurrently("page", lambda: calls.append(1) or "text")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [("text", False)] + [("text", True)] * 4)
+
+    def test_leader_exception_reaches_every_caller(self):
+        def fail():
+            raise RuntimeError("fetch failed")
+        results = self.run_concurrently("broken", fail)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+    def test_other_worker_result_is_loaded_instead_of_computed(self):
+        compute = mock.Mock(return_value="fetched")
+        with override_settings(SINGLE_FLIGHT_BACKEND="busy"), mock.patch.dict(LOCKS, busy=BusyLock):
+            self.assertEqual(single_flight("page", compute, lambda: "stored"), ("stored", True))
+            compute.assert_not_called()
+            self.assertEqual(single_flight("page", compute, lambda: None), ("fetched", False))
+        compute.assert_called_once()
+
+
+
+class MultiNameTests(TestCase):
+    def test_automaton_finds_what_brute_force_finds(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            patterns = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 6))]
+            text = "".join(rng.choice("abc") for _ in range(rng.randint(0, 40)))
+            expected = {
+                (start, start + len(pattern), pattern)
+                for pattern in set(patterns)
+                for start in range(len(text) - len(pattern) + 1)
+                if text.startswith(pattern, start)
+            }
+            self.assertEqual(set(PatternMatcher(patterns).finditer(text)), expected)
+
+    def test_several_names_in_one_pass(self):
+        text = "Notices\nResult of BSc 3rd Semester declared\nAdmit Card for Entrance Test 2025 released\nHoliday list"
+        names = ["Admit Card for Entrance Test 2025", "Result of BSc Third Semester", "Fee Notice"]
+        self.assertEqual(sorted(find_matches(text, names)), sorted(names[:2]))
+
+    def test_each_watcher_gets_its_own_snippet(self):
+        scraper = UniversalScraper("nta.ac.in")
+        scraper.text = "Admit Card for Entrance Test 2025 released." + " filler" * 200 + " Result of BSc Third Semester declared."
+        found = scraper.find_notifications(["Admit Card for Entrance Test 2025", "Result of BSc Third Semester"])
+        admit, _ = found["Admit Card for Entrance Test 2025"]
+        result, _ = found["Result of BSc Third Semester"]
+        self.assertIn("Admit Card", admit)
+        self.assertNotIn("Result of BSc", admit)
+        self.assertIn("Result of BSc", result)
+
+    def test_watchers_who_saw_this_version_are_skipped(self):
+        now = timezone.now()
+        url = "https://nta.ac.in/notices/"
+        WatchedPage.objects.create(url=url, changed_at=now - timedelta(hours=2))
+        seen = ScheduledNotificationRequest.objects.create(domain_or_url="nta.ac.in", notification_name="Admit Card 2025", last_checked_at=now - timedelta(hours=1))
+        new = ScheduledNotificationRequest.objects.create(domain_or_url="nta.ac.in", notification_name="Admit Card 2025")
+
+        def run_scraper(scraper, prefetched=None):
+            scraper.text = "Admit Card 2025 released"
+            return scraper.text, []
+
+        with mock.patch.object(UniversalScraper, "run_scraper", run_scraper), mock.patch("data_engine.tasks.query_ai", return_value="It is out"):
+            results = check_page(url, [seen, new])
+        self.assertEqual(results[seen.pk], (UNCHANGED_MESSAGE, "same_content", True))
+        self.assertEqual(results[new.pk], ("It is out", None, True))
+
+
+
+class IncompleteCheckTests(TestCase):
+    url = "https://nta.ac.in/notices/"
+
+    def setUp(self):
+        WatchedPage.objects.create(url=self.url, changed_at=timezone.now() - timedelta(days=1))
+        self.request = ScheduledNotificationRequest.objects.create(
+            domain_or_url="nta.ac.in", notification_name="Admit Card 2025", page_url=self.url,
+        )
+
+    def check(self, text, pdfs=(), scan=None):
+        def run_scraper(scraper, prefetched=None):
+            scraper.text, scraper.pdfs = text, list(pdfs)
+            return scraper.text, scraper.pdfs
+
+        with mock.patch.object(UniversalScraper, "run_scraper", run_scraper), \
+                mock.patch("data_engine.tasks.plan_tools", return_value=["playwright"]), \
+                mock.patch("data_engine.scraper.scan_pdfs", return_value=scan or PdfScanResult()), \
+                mock.patch("data_engine.tasks.query_ai", return_value="It is out"):
+            stats = check_watched_pages({self.url: [self.request.pk]})
+        self.request.refresh_from_db()
+        return stats
+
+    def test_failed_fetch_is_checked_again(self):
+        self.assertEqual(self.check("")["incomplete"], 1)
+        self.assertIsNone(self.request.last_checked_at)
+        # Same content as before the failure: still matched, not taken for already seen
+        stats = self.check("Admit Card 2025 released")
+        self.assertEqual((stats["found"], stats["same_content"]), (1, 0))
+        self.assertFalse(self.request.active)
+
+    def test_unsearched_pdfs_are_searched_next_cycle(self):
+        stats = self.check("Notices", pdfs=["a.pdf"], scan=PdfScanResult(unchecked=["https://nta.ac.in/notices/a.pdf"]))
+        self.assertEqual(stats["incomplete"], 1)
+        self.assertIsNone(self.request.last_checked_at)
+        self.check("Notices", pdfs=["a.pdf"], scan=PdfScanResult(checked=["https://nta.ac.in/notices/a.pdf"]))
+        self.assertIsNotNone(self.request.last_checked_at)
+
+
+class ChildProcessesTests(SimpleTestCase):
+    def test_kill_all_stops_running_and_later_children(self):
+        children = ChildProcesses()
+        process = children.start([sys.executable, "-c", "import time; time.sleep(30)"])
+        started = time.monotonic()
+        children.kill_all()
+        self.assertNotEqual(process.wait(timeout=5), 0)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertIsNone(children.start([sys.executable, "-c", "pass"]))
+
+
+class MetricsTests(SimpleTestCase):
+    @override_settings(METRICS_CACHE="default")
+    def test_counters_add_up(self):
+        metrics.incr("test.counter")
+        metrics.incr("test.counter", 4)
+        self.assertEqual(metrics.snapshot()["test.counter"], 5)
+
+    @override_settings(CACHES={"metrics": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://127.0.0.1:1/0",
+        "OPTIONS": {"socket_connect_timeout": 1},
+    }}, METRICS_CACHE="metrics")
+    def test_unreachable_cache_drops_counters(self):
+        metrics.incr("test.counter")
+        self.assertEqual(metrics.snapshot(), {})
+
+
+class BatchCheckTests(TestCase):
+    def setUp(self):
+        self.pages = {}
+        for site in ("nta.ac.in", "ugc.gov.in"):
+            url = f"https://{site}/notices/"
+            self.pages[url] = [ScheduledNotificationRequest.objects.create(domain_or_url=site, notification_name="Result", page_url=url).pk]
+
+    def test_chunk_is_fetched_in_one_batch(self):
+        def check_page(url, requests, prefetched=None, crawled=None):
+            return {req.pk: (UNCHANGED_MESSAGE, "not_modified", True) for req in requests}
+
+        with mock.patch("data_engine.tasks.plan_tools", return_value=["requests", "scrapy", "playwright"]), \
+                mock.patch("data_engine.tasks.fetch_pages", return_value={}) as fetch_pages, \
+                mock.patch("data_engine.tasks.check_page", check_page):
+            stats = check_watched_pages(self.pages)
+        self.assertEqual(fetch_pages.call_count, 1)
+        self.assertEqual(sorted(fetch_pages.call_args.args[0]), sorted(self.pages))
+        self.assertEqual((stats["pages"], stats["not_modified"]), (2, 2))
+
+    def test_failed_page_does_not_stop_the_chunk(self):
+        def check_page(url, requests, prefetched=None, crawled=None):
+            if "nta" in url:
+                raise RuntimeError("boom")
+            return {req.pk: (UNCHANGED_MESSAGE, "not_modified", True) for req in requests}
+
+        with mock.patch("data_engine.tasks.plan_tools", return_value=["playwright"]), \
+                mock.patch("data_engine.tasks.check_page", check_page):
+            stats = check_watched_pages(self.pages)
+        self.assertEqual(stats["pages"], 1)
+        failed = ScheduledNotificationRequest.objects.get(pk=self.pages["https://nta.ac.in/notices/"][0])
+        self.assertIsNone(failed.claimed_until)
+
+
+class DomainSchedulerTests(SimpleTestCase):
+    url = "https://nta.ac.in/notices/"
+
+    def scheduler(self, cls=DomainScheduler, **kwargs):
+        scheduler = cls(max_per_domain=2, rate=1.0, burst=2, **kwargs)
+        scheduler.robots.crawl_delay = lambda url: 0
+        return scheduler
+
+    def test_try_acquire_caps_requests_in_flight(self):
+        scheduler = self.scheduler()
+        self.assertEqual(scheduler.try_acquire(self.url), 0)
+        self.assertEqual(scheduler.try_acquire(self.url), 0)
+        self.assertGreater(scheduler.try_acquire(self.url), 0)
+        self.assertEqual(scheduler.try_acquire("https://ugc.gov.in/"), 0)  # other hosts are not held up
+        scheduler.release(self.url)
+        scheduler.domains["nta.ac.in"].tokens = 1
+        self.assertEqual(scheduler.try_acquire(self.url), 0)
+
+    def test_bucket_refills_at_the_rate(self):
+        scheduler = self.scheduler()
+        for _ in range(2):
+            scheduler.try_acquire(self.url)
+            scheduler.release(self.url)
+        wait = scheduler.try_acquire(self.url)
+        self.assertAlmostEqual(wait, 1.0, delta=0.05)
+        scheduler.domains["nta.ac.in"].updated -= 0.5
+        self.assertAlmostEqual(scheduler.try_acquire(self.url), 0.5, delta=0.05)
+        scheduler.domains["nta.ac.in"].updated -= 0.5
+        self.assertEqual(scheduler.try_acquire(self.url), 0)
+
+    def test_robots_crawl_delay_slows_the_host(self):
+        scheduler = self.scheduler()
+        scheduler.robots.crawl_delay = lambda url: 5
+        scheduler.configure(self.url)
+        self.assertEqual(scheduler.rate_of("nta.ac.in"), (0.2, 1))
+        self.assertEqual(scheduler.try_acquire(self.url), 0)
+        scheduler.release(self.url)
+        self.assertAlmostEqual(scheduler.try_acquire(self.url), 5.0, delta=0.05)
+
+    @override_settings(SCRAPER_POLITENESS_REDIS_URL="redis://127.0.0.1:1/0")
+    def test_shared_limits_fall_back_to_the_process_without_redis(self):
+        with mock.patch("data_engine.politeness._redis", None):
+            scheduler = self.scheduler(SharedDomainScheduler)
+            self.assertEqual(scheduler.try_acquire(self.url), 0)
+            self.assertEqual(scheduler.try_acquire(self.url), 0)
+            self.assertGreater(scheduler.try_acquire(self.url), 0)
+            scheduler.release(self.url)
+            self.assertEqual(scheduler.domains["nta.ac.in"].in_flight, 1)
@@ -0,0 +1,74 @@
+import hashlib
+import re
+import zlib
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import ExtractedText
+
+SPACES = re.compile(r"[ \t\r\xa0]+")
+PAGE_BREAK = "\f"
+
+
+def normalize_extracted(text):
+    """Collapses runs of spaces and drops blank lines; keeps case and line breaks for snippets."""
+    lines = (SPACES.sub(" ", line).strip() for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load(content_hash):
+    """Returns the stored ExtractedText for a hash, or None. Marks it used for the retention policy."""
+    if not content_hash:
+        return None
+    entry = ExtractedText.objects.filter(content_hash=content_hash).first()
+    if entry and timezone.now() - entry.last_used_at > timedelta(hours=1):
+        ExtractedText.objects.filter(pk=entry.pk).update(last_used_at=timezone.now())
+    return entry
+
+
+def save(content_hash, kind, url, pages, pdf_links=None):
+    """Stores normalized text (a string, or a list of PDF page texts) under its content hash."""
+    if not content_hash:
+        return None
+    # Unchanged pages are saved again on every fetch: only normalize and compress new texts
+    entry = ExtractedText.objects.filter(content_hash=content_hash).first()
+    if entry is not None:
+        return entry
+    if isinstance(pages, str):
+        pages = [pages]
+    text = PAGE_BREAK.join(normalize_extracted(page) for page in pages)
+    try:
+        with transaction.atomic():
+            entry = ExtractedText.objects.create(
+                content_hash=content_hash,
+                kind=kind,
+                source_url=url[:500],
+                compressed_text=zlib.compress(text.encode("utf-8"), 6),
+                pdf_links=pdf_links or [],
+                char_count=len(text),
+            )
+    except IntegrityError:  # stored by another worker in the meantime
+        entry = ExtractedText.objects.filter(content_hash=content_hash).first()
+    return entry
+
+
+def prune(retention_days=None, max_rows=None):
+    """Deletes texts unused for TEXT_STORE_RETENTION_DAYS, then the least recently used beyond TEXT_STORE_MAX_ROWS."""
+    retention_days = retention_days or getattr(settings, "TEXT_STORE_RETENTION_DAYS", 90)
+    max_rows = max_rows or getattr(settings, "TEXT_STORE_MAX_ROWS", 20000)
+
+    expired, _ = ExtractedText.objects.filter(last_used_at__lt=timezone.now() - timedelta(days=retention_days)).delete()
+    overflow = 0
+    cutoff = ExtractedText.objects.order_by("-last_used_at").values_list("last_used_at", flat=True)[max_rows:max_rows + 1]
+    if cutoff:
+        overflow, _ = ExtractedText.objects.filter(last_used_at__lte=cutoff[0]).delete()
+    return expired + overflow
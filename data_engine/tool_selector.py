@@ -0,0 +1,77 @@
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from .models import ScraperChoice, ScraperToolStat
+
+# Rough cost of one attempt in seconds, before any latency has been measured
+TOOL_COST = {"requests": 0.5, "scrapy": 1.0, "playwright": 5.0}
+SMOOTHING = 0.3  # weight of the newest attempt in the running averages
+MIN_SUCCESS_RATE = 0.05
+
+
+def expected_cost(tool, stat):
+    """Seconds we expect to spend per successful scrape with this tool: time per attempt / success rate."""
+    if stat is None:
+        return TOOL_COST[tool] / 0.5
+    latency = stat.avg_latency or TOOL_COST[tool]
+    return (TOOL_COST[tool] + latency) / max(stat.success_rate, MIN_SUCCESS_RATE)
+
+
+def plan_tools(url):
+    """
+    Orders the tools for a URL by expected cost per success, so the cheap tools go first until
+    their record says otherwise. A cheaper tool that lost its place is re-tried first once every
+    SCRAPER_TOOL_RECHECK_DAYS, in case the site stopped needing the browser.
+    """
+    stats = {stat.tool: stat for stat in ScraperToolStat.objects.filter(url=url)}
+    order = sorted(TOOL_COST, key=lambda tool: (expected_cost(tool, stats.get(tool)), TOOL_COST[tool]))
+
+    recheck_after = timedelta(days=getattr(settings, "SCRAPER_TOOL_RECHECK_DAYS", 7))
+    now = timezone.now()
+    for tool in sorted(TOOL_COST, key=TOOL_COST.get):
+        if TOOL_COST[tool] >= TOOL_COST[order[0]]:
+            break
+        stat = stats.get(tool)
+        if stat and stat.last_attempted and now - stat.last_attempted > recheck_after:
+            print(f"🔁 Re-checking cheaper tool {tool} for {url}")
+            order.remove(tool)
+            order.insert(0, tool)
+            break
+    return order
+
+
+def record_attempt(url, tool, success, latency):
+    """Updates the per-tool running stats and the URL's ScraperChoice."""
+    now = timezone.now()
+    stat, _ = ScraperToolStat.objects.get_or_create(url=url, tool=tool)
+    stat.attempts += 1
+    stat.success_rate = SMOOTHING * (1 if success else 0) + (1 - SMOOTHING) * stat.success_rate
+    # Failed attempts count too: a tool that times out is expensive
+    stat.avg_latency = latency if not stat.avg_latency else SMOOTHING * latency + (1 - SMOOTHING) * stat.avg_latency
+    stat.last_attempted = now
+    if success:
+        stat.successes += 1
+        stat.last_success = now
+    stat.save()
+
+    choice, _ = ScraperChoice.objects.get_or_create(url=url, defaults={"tool": tool})
+    if success:
+        choice.tool = tool
+        choice.last_success = now
+        choice.fail_count = 0
+    else:
+        choice.fail_count += 1
+    choice.save()
+
+
+def should_hedge(url, plan):
+    """
+    Race requests against the browser when requests goes first but we can't trust it yet:
+    no history, too few attempts, or a success rate somewhere in the middle.
+    """
+    if getattr(settings, "SCRAPER_HEDGE_DELAY", None) is None:
+        return False
+    if plan[0] != "requests" or "playwright" not in plan:
+        return False
+    stat = ScraperToolStat.objects.filter(url=url, tool="requests").first()
+    return stat is None or stat.attempts < 3 or 0.2 <= stat.success_rate <= 0.8
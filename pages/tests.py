@@ -1,3 +1,36 @@
+from datetime import timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+
+from data_engine.models import ChatScrapeJob, Notification
+from .views import answer_from_index, parse_expected_by
+
+
+class AnswerFromIndexTests(TestCase):
+    def test_only_answers_for_the_notification_asked_for(self):
+        Notification.objects.create(title="Result of Semester 12 declared", url="https://nta.ac.in/r12.pdf")
+        self.assertIsNone(answer_from_index("nta.ac.in", "Result of Semester 1"))
+        Notification.objects.create(title="Result of Semester 1", url="https://nta.ac.in/r1.pdf")
+        self.assertIn("r1.pdf", answer_from_index("nta.ac.in", "Result of Semester 1"))
+
+    def test_search_limit_is_clamped(self):
+        Notification.objects.create(title="Result 1", url="https://nta.ac.in/1.pdf")
+        Notification.objects.create(title="Result 2", url="https://nta.ac.in/2.pdf")
+        response = self.client.get("/notifications/search/", {"q": "result", "limit": "-1"})
+        self.assertEqual(len(response.json()["results"]), 1)
+
+
+class ChatScrapeStatusTests(TestCase):
+    def test_job_nobody_picked_up_goes_stale(self):
+        job = ChatScrapeJob.objects.create(domain="nta.ac.in", notification_name="Admit Card")
+        self.assertFalse(self.client.get(f"/chat/jobs/{job.pk}/").json()["stale"])
+        ChatScrapeJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertTrue(self.client.get(f"/chat/jobs/{job.pk}/").json()["stale"])
+
 
-# Create your tests here.
+class ExpectedByTests(TestCase):
+    def test_parses_intent_dates(self):
+        self.assertEqual(parse_expected_by("2026-11-20").date().isoformat(), "2026-11-20")
+        self.assertIsNone(parse_expected_by(None))
+        self.assertIsNone(parse_expected_by("soon"))
@@ -1,13 +1,15 @@
 from django.urls import path
-from .views import home, notifications, signup, signin, chat_view, chatbot_query
+from .views import home, notifications, notification_search, signup, signin, chat_view, chatbot_query, chat_scrape_status
 from django.contrib.auth.views import LogoutView
 
 urlpatterns = [
     path('', home, name='home'),
     path('notifications/', notifications, name='notifications'),
+    path('notifications/search/', notification_search, name='notification_search'),
     path('signup/', signup, name='signup'),
     path('signin/', signin, name='signin'),
     path('logout/', LogoutView.as_view(next_page='home'), name='logout'),
     path("chat/", chat_view, name="chat"),
     path("chatbot_query/", chatbot_query, name="chatbot_query"),
+    path("chat/jobs/<uuid:job_id>/", chat_scrape_status, name="chat_scrape_status"),
 ]
@@ -1,27 +1,67 @@
-import json, re, threading
+import json, re
+from datetime import date, datetime, time as dt_time, timedelta
+from django.conf import settings
+from django.utils import timezone
 from collections import defaultdict
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import login
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404
 from .forms import CustomUserCreationForm
-from data_engine.models import Notification, ScheduledNotificationRequest
+from data_engine.models import Notification, ScheduledNotificationRequest, ChatScrapeJob
 from data_engine.ai_query import query_ai
-from data_engine.tasks import scrape_notification  # Celery task for scraping
+from data_engine.tasks import start_chat_scrape  # queues the scrape on the chat Celery queue
+from data_engine.search_index import search_notifications
+from data_engine.matching import find_matches
 
 def home(request):
     return render(request, 'pages/home.html')
 
 def notifications(request):
-    notifications_qs = Notification.objects.all().order_by('-created_at')
+    query = request.GET.get('q', '').strip()
+    if query:
+        notifications_qs = search_notifications(query, limit=200)
+    else:
+        notifications_qs = Notification.objects.all().order_by('-created_at')
     grouped_notifications = defaultdict(list)
     for notification in notifications_qs:
         grouped_notifications[notification.base_url].append(notification)
     grouped_notifications = dict(sorted(grouped_notifications.items()))
     return render(request, 'pages/notifications.html', {
-        'grouped_notifications': grouped_notifications
+        'grouped_notifications': grouped_notifications,
+        'query': query,
     })
 
+def notification_search(request):
+    """JSON search API: /notifications/search/?q=admit card&domain=nta.ac.in&limit=20"""
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({"error": "Missing q"}, status=400)
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 20)), 100))
+    except ValueError:
+        limit = 20
+    results = search_notifications(query, domain=request.GET.get('domain', '').strip() or None, limit=limit)
+    return JsonResponse({"results": [
+        {
+            "title": notification.title,
+            "url": notification.url,
+            "published_at": notification.published_at.isoformat() if notification.published_at else None,
+            "created_at": notification.created_at.isoformat(),
+        }
+        for notification in results
+    ]})
+
+def answer_from_index(domain, notification_name):
+    """An instant reply when the notification is already in our scraped data, else None."""
+    hits = search_notifications(notification_name, domain=domain, limit=5)
+    # Search ranks near misses too; only answer for a title that really is the notification asked for
+    notification = next((hit for hit in hits if find_matches(hit.title, [notification_name])), None)
+    if notification is None:
+        return None
+    published = f" (published {notification.published_at:%b %d, %Y})" if notification.published_at else ""
+    return f"✅ '{notification.title}' is already out on {domain}{published}.\n\n🔗 Link: {notification.url}"
+
 def signup(request):
     if request.method == "POST":
         form = CustomUserCreationForm(request.POST)
@@ -44,35 +84,13 @@ def signin(request):
         form = AuthenticationForm()
     return render(request, 'pages/signin.html', {"form": form})
 
-def run_full_scraper(domain, notification_name, user):
-    """
-    Full heavy scraping happening here without blocking chatbot.
-    """
-    from data_engine.models import ScheduledNotificationRequest
-    from django.core.mail import send_mail
-    from django.conf import settings
-
-    summary = scrape_notification(domain, notification_name)
-
-    if summary and summary != "❌ Notification not found.":
-        req = ScheduledNotificationRequest.objects.filter(
-            user=user,
-            domain_or_url=domain,
-            notification_name=notification_name,
-            active=True
-        ).first()
-        if req:
-            req.active = False
-            req.save()
-
-        if user and user.email:
-            send_mail(
-                f"✅ Notification Found: {notification_name}",
-                summary,
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
-                fail_silently=True,
-            )
+def parse_expected_by(value):
+    """The end of the day the user expects the notification by ("YYYY-MM-DD" from the intent JSON), or None."""
+    try:
+        day = date.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+    return timezone.make_aware(datetime.combine(day, dt_time(23, 59)))
 
 def chatbot_query(request):
     if request.method == "POST":
@@ -89,7 +107,9 @@ def chatbot_query(request):
 You are an assistant that must decide between two modes:
 - For normal chat, output exactly: {{"intent": "chat", "answer": "your normal answer"}}
 - If the user is asking for a specific website notification (for example, "Check if 'Admit Card 2025' is out on example.edu"), 
-  output exactly: {{"intent": "notification", "domain": "example.edu", "notification_name": "Admit Card 2025"}}
+  output exactly: {{"intent": "notification", "domain": "example.edu", "notification_name": "Admit Card 2025", "expected_by": null}}
+- If they also say when they expect it (for example, "it should be out by 20 November"), put that date in
+  "expected_by" as "YYYY-MM-DD". Today is {timezone.localdate():%Y-%m-%d}.
 Do not output any extra text.
 User message: "{user_message}"
 """
@@ -117,27 +137,39 @@ User message: "{user_message}"
                 fallback_answer = query_ai(user_message)
                 return JsonResponse({"response": fallback_answer})
 
-            # Start full scraping in a background thread immediately
-            if request.user.is_authenticated:
+            # Already scraped? Answer from the search index without a live scrape
+            indexed_answer = answer_from_index(domain, notification_name)
+            if indexed_answer:
+                return JsonResponse({"response": indexed_answer})
+
+            # Queue the full scrape for a worker; chat.html polls chat_scrape_status for the result
+            user = request.user if request.user.is_authenticated else None  # unauthenticated users won't receive email notifications
+            if user:
+                defaults = {"active": True}
+                expected_by = parse_expected_by(ai_intent.get("expected_by"))
+                if expected_by:
+                    defaults["expected_by"] = expected_by  # checked more often as it gets close, see data_engine.polling
                 ScheduledNotificationRequest.objects.update_or_create(
-                    user=request.user,
+                    user=user,
                     domain_or_url=domain,
                     notification_name=notification_name,
-                    defaults={"active": True}
+                    defaults=defaults
                 )
+            job = start_chat_scrape(domain, notification_name, user)
 
-                threading.Thread(target=run_full_scraper, args=(domain, notification_name, request.user)).start()
-
-            else:
-                # Unauthenticated users won't receive email notifications
-                threading.Thread(target=run_full_scraper, args=(domain, notification_name, None)).start()
+            if job is None:
+                busy_message = (
+                    f"📢 Lots of people are checking right now, so we've scheduled a check for '{notification_name}' on {domain}."
+                    + (" We'll email you once the update is found!" if user else " Please ask again in a few minutes.")
+                )
+                return JsonResponse({"response": busy_message})
 
             # Immediate polite fallback
             fallback_message = (
                 f"📢 We’re checking for '{notification_name}' on {domain} right now. "
                 "Please stay tuned — we'll notify you once the update is found!"
             )
-            return JsonResponse({"response": fallback_message})
+            return JsonResponse({"response": fallback_message, "job_id": str(job.pk)})
 
         else:
             fallback_answer = query_ai(user_message)
@@ -145,5 +177,21 @@ User message: "{user_message}"
 
     return JsonResponse({"error": "Invalid request"}, status=400)
 
+def chat_scrape_status(request, job_id):
+    """Progress of a chatbot scrape, polled by chat.html until its status is done or failed."""
+    job = get_object_or_404(ChatScrapeJob, pk=job_id)
+    if job.user_id and job.user_id != request.user.id:
+        raise Http404
+    stale_after = timedelta(seconds=getattr(settings, "CHAT_SCRAPE_STALE_SECONDS", 15 * 60))
+    return JsonResponse({
+        "status": job.status,
+        "progress": job.progress,
+        "summary": job.summary,
+        # Queued with no worker to take it, or running but silent: the page stops polling
+        "stale": job.status in ("queued", "running") and timezone.now() - job.updated_at > stale_after,
+    })
+
 def chat_view(request):
-    return render(request, "pages/chat.html")
+    return render(request, "pages/chat.html", {
+        "chat_scrape_stale_seconds": getattr(settings, "CHAT_SCRAPE_STALE_SECONDS", 15 * 60),
+    })